@@ -4,11 +4,13 @@ import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
-from statsmodels.tsa.arima.model import ARIMA
 import datetime
-import time
-import io
+import os
+import shutil
+import sys
+import uuid
 import warnings
+from concurrent.futures.process import BrokenProcessPool
 warnings.filterwarnings('ignore')
 
 # ---------- HELPER FUNCTIONS ----------
@@ -33,34 +35,29 @@ try:
     from st_aggrid import AgGrid, GridOptionsBuilder, GridUpdateMode, DataReturnMode
 except ImportError:
     AgGrid = None
-try:
-    import kaleido  # noqa: F401
-except ImportError:
-    kaleido = None
-import tempfile
-from PIL import Image
 
-# Additional imports for new tabs
-import importlib
-from io import BytesIO
+# Data, aggregation, forecasting and report logic lives in the headless engine
+from covid_core import (
+    COLUMN_LABELS, EXPORT_FORMATS, FILTER_CACHE_MAX_BYTES, FORECAST_MAX_COUNTRIES, FORECAST_TIMEOUT_SECONDS,
+    MAP_CACHE_MAX_BYTES, MAP_DEFAULT_BUDGET, MAP_MIN_SHARE, MAP_PAYLOAD_BUDGETS, REPORT_TOC, STREAMED_FORMATS,
+    TABLE_PAGE_SIZES, TREND_WINDOWS_DAYS, ByteLRUCache, FilterCache, as_of_rows, available_compressions,
+    build_animated_map, build_export, build_filter_index, build_rollup_cube, build_snapshot_index, chart_images,
+    column_formats, correlation_inputs, country_summary, excel_benchmark, export_file_name, export_mime,
+    filter_benchmark, filter_data, filter_key, float_counts, forecast_executor, forecast_history,
+    forecast_time_limited, format_bytes, generate_pdf, import_time_report, iter_forecasts, kpi_snapshot,
+    lazy_import, load_dataset, map_figure_key, module_available, new_count_columns, prune_export_files,
+    radar_matrix, region_date_summary, regional_summary, regional_timeline, regional_trends, report_summary,
+    rolling_column, slice_cube, stop_forecast_executor, table_page, table_positions, top_countries, trend_timeline,
+    weekly_view, window_rows, write_export
+)
 
-# Prophet for forecasting
-try:
-    from prophet import Prophet
-except ImportError:
-    Prophet = None
-try:
-    import seaborn as sns
-    import matplotlib.pyplot as plt
-except ImportError:
-    sns = None
-    plt = None
-try:
-    from reportlab.lib.pagesizes import letter
-    from reportlab.pdfgen import canvas
-    from reportlab.lib.utils import ImageReader
-except ImportError:
-    canvas = None
+def table_column_config(columns, labels=None):
+    """
+    st.dataframe column_config of the shared display formats (see column_formats): values stay numeric,
+    so the grid sorts them as numbers and formats them client-side
+    """
+    return {col: st.column_config.NumberColumn(**spec) if "format" in spec else spec["label"]
+            for col, spec in column_formats(columns, labels).items()}
 
 # ---------- PAGE CONFIG AND THEME ----------
 st.set_page_config(
@@ -372,7 +369,7 @@ st.markdown("""
     .ag-theme-streamlit .ag-root-wrapper { border-radius: 13px !important; border: 1.7px solid #eaf1ff !important; }
 
     /* --- Enhanced Buttons --- */
-    .stButton>button, .stDownloadButton>button {
+    .stButton>button, .stDownloadButton>button, a.file-download {
         border-radius: 13px;
         font-weight: 700;
         font-size: 1.07rem;
@@ -384,7 +381,8 @@ st.markdown("""
         box-shadow: 0 1.5px 6px 0 rgba(110,168,254,0.10);
         transition: background 0.24s, color 0.21s, box-shadow 0.19s;
     }
-    .stButton>button:hover, .stDownloadButton>button:hover {
+    a.file-download { display: inline-block; text-decoration: none; }
+    .stButton>button:hover, .stDownloadButton>button:hover, a.file-download:hover {
         background: linear-gradient(90deg, #ffb86c 40%, #ff7b7b 100%);
         color: #fff;
         border: 1.5px solid #ffb86c;
@@ -428,83 +426,114 @@ st.markdown("""
 @st.cache_data(ttl=3600, show_spinner=False)
 def load_data(dataset_type="weekly"):
     """
-    Optimized data loading function with robust error handling
+    Optimized data loading function with robust error handling.
+    The processed store, incremental append and rebuild logic lives in covid_core.load_dataset().
     """
     try:
-        start_time = time.time()
-        if dataset_type == "daily":
-            file_path = "WHO-COVID-19-global-daily-data.csv"
-            df = pd.read_csv(file_path, parse_dates=['Date_reported'])
-        else:  # weekly data
-            file_path = "WHO-COVID-19-global-data.csv"
-            df = pd.read_csv(file_path, parse_dates=['Date_reported'])
-            
-        # Basic data cleaning
-        df['Year'] = df['Date_reported'].dt.year
-        df['Month'] = df['Date_reported'].dt.strftime('%b %Y')
-        df['Week'] = df['Date_reported'].dt.isocalendar().week
-        
-        # Handle NaN values in WHO_region to fix tree map errors
-        df['WHO_region'] = df['WHO_region'].fillna('OTHER')
-        
-        # Make sure Country has no NaN values
-        df['Country'] = df['Country'].fillna('Unknown')
-        
-        # Calculate metrics based on data type
-        df = df.sort_values(['Country', 'Date_reported'])
-        
-        if dataset_type == "daily":
-            # Daily metrics
-            df['New_daily_cases'] = df.groupby('Country')['Cumulative_cases'].diff().fillna(0)
-            df['New_daily_deaths'] = df.groupby('Country')['Cumulative_deaths'].diff().fillna(0)
-            
-            # Calculate weekly metrics from daily data
-            df['week_id'] = df['Date_reported'].dt.strftime('%Y-%U')
-            weekly_aggs = df.groupby(['Country', 'WHO_region', 'week_id']).agg({
-                'Date_reported': 'last',
-                'Cumulative_cases': 'last',
-                'Cumulative_deaths': 'last',
-                'New_daily_cases': 'sum',
-                'New_daily_deaths': 'sum'
-            }).reset_index()
-            
-            weekly_aggs = weekly_aggs.rename(columns={
-                'New_daily_cases': 'New_weekly_cases',
-                'New_daily_deaths': 'New_weekly_deaths'
-            })
-            
-            # Merge weekly metrics back into daily data
-            df = pd.merge(
-                df, 
-                weekly_aggs[['Country', 'Date_reported', 'New_weekly_cases', 'New_weekly_deaths']], 
-                how='left', 
-                on=['Country', 'Date_reported']
-            )
-        else:
-            # Weekly metrics
-            df['New_weekly_cases'] = df.groupby('Country')['Cumulative_cases'].diff().fillna(0)
-            df['New_weekly_deaths'] = df.groupby('Country')['Cumulative_deaths'].diff().fillna(0)
-            
-            # Add placeholder columns for UI consistency
-            df['New_daily_cases'] = np.nan
-            df['New_daily_deaths'] = np.nan
-        
-        # Fix negative values
-        for col in ['New_daily_cases', 'New_daily_deaths', 'New_weekly_cases', 'New_weekly_deaths']:
-            if col in df.columns:
-                df[col] = df[col].clip(lower=0)
-        
-        # Calculate mortality rate
-        df['Mortality_rate'] = (df['Cumulative_deaths'] / df['Cumulative_cases'] * 100).round(2)
-        df['Mortality_rate'] = df['Mortality_rate'].fillna(0).replace([np.inf, -np.inf], 0)
-        
-        # Calculate load time for performance monitoring
-        load_time = time.time() - start_time
-        return df, load_time
-    
+        return load_dataset(dataset_type)
     except Exception as e:
         st.error(f"Error loading data: {e}")
-        return pd.DataFrame(), 0
+        return pd.DataFrame(), 0, {}
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def filter_index(dataset_type, source_sha256, _df):
+    """
+    Position index of a loaded dataset for the sidebar filters, built once per source file
+    """
+    return build_filter_index(_df)
+
+@st.cache_resource(show_spinner=False)
+def filter_view_cache():
+    """
+    LRU cache of filtered views shared by all sessions, bounded by FILTER_CACHE_MAX_BYTES
+    """
+    return FilterCache(FILTER_CACHE_MAX_BYTES)
+
+@st.cache_resource(show_spinner=False, max_entries=32)
+def view_snapshot(view_key, _filtered):
+    """
+    As-of snapshot index of a filtered view (each country's latest rows), built once per view
+    """
+    return build_snapshot_index(_filtered)
+
+@st.cache_resource(show_spinner=False, max_entries=16)
+def table_order(view_key, table_option, sort_column, ascending, search, _frame):
+    """
+    Display order of a paged table (see table_positions), kept so page changes only slice it
+    """
+    return table_positions(_frame, sort_column, ascending, search)
+
+@st.cache_resource(show_spinner=False)
+def map_figure_cache():
+    """
+    LRU cache of built animated maps shared by all sessions, bounded by MAP_CACHE_MAX_BYTES of figure JSON
+    """
+    return ByteLRUCache(MAP_CACHE_MAX_BYTES, sizeof=lambda entry: entry[1]["json_bytes"])
+
+@st.cache_resource(show_spinner=False, max_entries=32)
+def cached_export(view_key, export_format, compression, _filtered, start_date, end_date, dataset_type, _rollup=None):
+    """
+    Export artifact of a filtered view and its build time, shared by every session showing the same view.
+    The PDF report names the selected dates, so they are part of the key. The Excel workbook also carries
+    the Data Table tab's by-country and by-region summaries.
+    """
+    summaries = None
+    if export_format == "Excel":
+        summaries = {
+            "By Country": country_summary(_filtered, dataset_type, rollup=_rollup),
+            "By Region": region_date_summary(_filtered, dataset_type, rollup=_rollup),
+        }
+    return build_export(_filtered, export_format, start_date, end_date, compression, summaries)
+
+# Streamed exports are written under the app's static folder and downloaded from disk (needs
+# server.enableStaticServing, which .streamlit/config.toml sets); Streamlit serves at most 200 MB per file
+EXPORT_STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static", "exports")
+EXPORT_STATIC_MAX_BYTES = 200 * 1024 * 1024
+EXPORT_FILE_TTL_SECONDS = 3600
+
+@st.cache_resource(show_spinner=False, max_entries=32, ttl=EXPORT_FILE_TTL_SECONDS // 2)
+def cached_export_file(view_key, export_format, compression, _filtered):
+    """
+    Streamed export of a filtered view written to its own file under EXPORT_STATIC_DIR, shared by every
+    session showing the same view. Cache entries expire before their files are pruned.
+    Returns (static URL, bytes written, build_seconds), or None when the file would exceed
+    EXPORT_STATIC_MAX_BYTES; nothing is left on disk then or when the write fails.
+    """
+    prune_export_files(EXPORT_STATIC_DIR, EXPORT_FILE_TTL_SECONDS)
+    export_id = uuid.uuid4().hex
+    export_dir = os.path.join(EXPORT_STATIC_DIR, export_id)
+    file_name = export_file_name(export_format, compression)
+    try:
+        os.makedirs(export_dir)
+        size, seconds = write_export(
+            _filtered, export_format, os.path.join(export_dir, file_name), compression, max_bytes=EXPORT_STATIC_MAX_BYTES
+        )
+    except Exception:
+        shutil.rmtree(export_dir, ignore_errors=True)
+        raise
+    if size is None:
+        shutil.rmtree(export_dir, ignore_errors=True)
+        return None
+    return f"app/static/exports/{export_id}/{file_name}", size, seconds
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def rollup_cube(dataset_type, source_sha256, _df):
+    """
+    Rollup cube of a loaded dataset, built once per source file and shared by all sessions.
+    Held as a resource so the KPI cards and tabs read it without copying it on every rerun.
+    """
+    return build_rollup_cube(_df)
+
+@st.cache_resource(show_spinner=False)
+def forecast_pool():
+    """
+    Process pool fitting forecasts for all sessions, one worker per available core
+    """
+    return forecast_executor()
+
+@st.cache_data(show_spinner=False)
+def cached_import_time_report():
+    return import_time_report()
 
 #####################
 # --- SIDEBAR ----
@@ -538,8 +567,27 @@ with st.sidebar:
 
     # --- Data Loading Spinner ---
     with st.spinner('Loading and processing data...'):
-        covid_data, load_time = load_data(dataset_type.lower())
-    st.caption(f"Data loaded in {load_time:.2f} seconds")
+        covid_data, load_time, load_info = load_data(dataset_type.lower())
+    if load_info:
+        st.caption(
+            f"Data loaded in {load_time:.2f} seconds ({load_info['source']}, full rebuild {load_info['build_seconds']:.2f}s) · "
+            f"memory {format_bytes(load_info['memory_before'])} → {format_bytes(load_info['memory_after'])}"
+        )
+    with st.expander("⏱️ Import-time report"):
+        st.caption(
+            "Heavy libraries are imported on first use. Times are what each would add to startup "
+            "if imported at the top of the app (python -X importtime)."
+        )
+        if st.button("Measure import times"):
+            import_report = cached_import_time_report()
+            import_report["Loaded this session"] = [name in sys.modules for name in import_report["Module"]]
+            st.dataframe(import_report, hide_index=True, use_container_width=True)
+    if load_info:
+        with st.expander("⚡ Filter benchmark"):
+            st.caption("Sidebar filters gather rows through a date/country/region index instead of scanning boolean masks.")
+            if st.button("Benchmark filters"):
+                benchmark = filter_benchmark(covid_data, filter_index(dataset_type, load_info["source_sha256"], covid_data))
+                st.dataframe(benchmark, hide_index=True, use_container_width=True)
 
     # --- Filters in Card Panels ---
     if not covid_data.empty:
@@ -606,6 +654,13 @@ with st.sidebar:
         st.markdown("#### Visualization Options")
         log_scale = st.checkbox("Use Log Scale", value=True, help="Better for comparing values of different magnitudes")
         show_trends = st.checkbox("Show Trend Lines", value=True, help="Display moving averages")
+        trend_windows_days = st.multiselect(
+            "Trend Windows (days)",
+            options=list(TREND_WINDOWS_DAYS),
+            default=[7] if dataset_type == "Daily" else [28],
+            disabled=not show_trends,
+            help="Overlay moving averages over several windows; weekly data uses whole weeks"
+        )
         with st.expander("Advanced Options", expanded=False):
             animation_speed = st.slider("Animation Speed", 100, 1000, 300, step=100, 
                                        help="Speed of map animations in milliseconds")
@@ -615,6 +670,13 @@ with st.sidebar:
                 index=0,
                 help="Visual theme for map displays"
             )
+            map_detail = st.select_slider(
+                "Map Detail",
+                options=list(MAP_PAYLOAD_BUDGETS),
+                value=MAP_DEFAULT_BUDGET,
+                help="Size budget of the animated map: lighter maps load faster on slow connections, "
+                     "fuller ones animate more dates. Light also leaves out countries with very small counts."
+            )
             color_theme = st.selectbox(
                 "Color Theme", 
                 ["Viridis", "Plasma", "Inferno", "Turbo"], 
@@ -629,66 +691,80 @@ with st.sidebar:
 
         # Apply filters
         with st.spinner('Applying filters...'):
-            filtered = covid_data[
-                (covid_data['Date_reported'] >= start_date_ts) &
-                (covid_data['Date_reported'] <= end_date_ts)
-            ]
-            if region_filter:
-                filtered = filtered[filtered['WHO_region'].isin(region_filter)]
-            if country_filter:
-                filtered = filtered[filtered['Country'].isin(country_filter)]
+            index = filter_index(dataset_type, load_info["source_sha256"], covid_data)
+            # Tab switches and display options rerun the script with the same filter, so reuse its view
+            view_cache = filter_view_cache()
+            view_key = filter_key(dataset_type, load_info["source_sha256"], start_date_ts, end_date_ts, region_filter, country_filter)
+            filtered = view_cache.get_or_compute(
+                view_key,
+                lambda: filter_data(covid_data, start_date_ts, end_date_ts, region_filter, country_filter, index=index)
+            )
+            # Aggregations for date/region filters are answered from the rollup cube; a country filter uses the rows
+            rollup = slice_cube(
+                rollup_cube(dataset_type, load_info["source_sha256"], covid_data),
+                start_date_ts, end_date_ts, region_filter, country_filter
+            )
+
+        cache_stats = view_cache.stats()
+        st.caption(
+            f"Filter cache: {cache_stats['hits']:,} hits / {cache_stats['misses']:,} misses · "
+            f"{cache_stats['entries']} views, {format_bytes(cache_stats['bytes'])} of {format_bytes(cache_stats['max_bytes'])}"
+        )
 
         # --- Download Section as Card Panel ---
         if not filtered.empty:
             st.markdown('<div class="sidebar-download-card">', unsafe_allow_html=True)
             st.markdown('<div class="sidebar-download-header">📥 Download Full Analytics Report</div>', unsafe_allow_html=True)
-            # CSV
-            csv_data = filtered.to_csv(index=False)
-            # Excel
-            excel_buffer = io.BytesIO()
-            with pd.ExcelWriter(excel_buffer, engine='openpyxl') as writer:
-                filtered.to_excel(writer, sheet_name="Filtered Data", index=False)
-            excel_buffer.seek(0)
-            # JSON
-            json_data = filtered.to_json(orient='records')
-            # PDF report (using reportlab and map snapshot if available)
-            pdf_buffer = None
-            if canvas is not None:
-                pdf_buffer = io.BytesIO()
-                c = canvas.Canvas(pdf_buffer, pagesize=letter)
-                width, height = letter
-                c.setFont("Helvetica-Bold", 24)
-                c.drawCentredString(width/2, height-100, "COVID-19 Analytics Report")
-                c.setFont("Helvetica", 14)
-                c.drawCentredString(width/2, height-130, f"Author: Manjot Singh")
-                c.drawCentredString(width/2, height-150, f"Date Range: {start_date.strftime('%b %d, %Y')} - {end_date.strftime('%b %d, %Y')}")
-                c.showPage()
-                c.setFont("Helvetica-Bold", 20)
-                c.drawString(50, height-50, "Key Metrics")
-                global_cases = int(filtered['Cumulative_cases'].sum())
-                global_deaths = int(filtered['Cumulative_deaths'].sum())
-                affected_countries = filtered['Country'].nunique()
-                c.setFont("Helvetica", 12)
-                c.drawString(50, height-80, f"Affected Countries: {affected_countries}")
-                c.drawString(50, height-100, f"Total Cases: {global_cases:,}")
-                c.drawString(50, height-120, f"Total Deaths: {global_deaths:,}")
-                if 'fig_map' in locals() and kaleido is not None:
-                    tmp_map_path = tempfile.NamedTemporaryFile(delete=False, suffix=".png").name
-                    fig_map.write_image(tmp_map_path, engine="kaleido")
-                    c.drawImage(tmp_map_path, 50, height-400, width=500, preserveAspectRatio=True)
-                c.showPage()
-                c.save()
-                pdf_buffer.seek(0)
-            col1, col2, col3, col4 = st.columns(4)
-            with col1:
-                st.download_button("📥 CSV", data=csv_data, file_name="covid_full_analysis.csv", mime="text/csv")
-            with col2:
-                st.download_button("📊 Excel", data=excel_buffer, file_name="covid_full_analysis.xlsx", mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
-            with col3:
-                st.download_button("🔄 JSON", data=json_data, file_name="covid_full_analysis.json", mime="application/json")
-            with col4:
-                if pdf_buffer is not None:
-                    st.download_button("📄 PDF Report", data=pdf_buffer, file_name="covid_full_analysis_report.pdf", mime="application/pdf")
+            # Each artifact is built only when its button is pressed, then cached for this view
+            requested_exports = st.session_state.setdefault("requested_exports", {})
+            export_compression = st.selectbox(
+                "Compression", ["None", *available_compressions()],
+                help="CSV, JSON and NDJSON are encoded in row batches and compressed as they stream."
+            )
+            export_columns = st.columns(3)
+            for i, (export_format, export_spec) in enumerate(EXPORT_FORMATS.items()):
+                with export_columns[i % len(export_columns)]:
+                    if export_format == "PDF" and not module_available("reportlab"):
+                        continue
+                    compression = export_compression if export_format in STREAMED_FORMATS and export_compression != "None" else None
+                    request = (view_key, compression)
+                    if requested_exports.get(export_format) == request or st.button(export_spec["label"], key=f"prepare_{export_format}"):
+                        requested_exports[export_format] = request
+                        export_file = None
+                        if export_format in STREAMED_FORMATS and st.get_option("server.enableStaticServing"):
+                            # Encoded and compressed batch by batch straight to disk; the browser fetches the file.
+                            # A file the server cannot write or serve is built in memory instead.
+                            try:
+                                export_file = cached_export_file(view_key, export_format, compression, filtered)
+                                if export_file is None:
+                                    st.caption(f"Over {format_bytes(EXPORT_STATIC_MAX_BYTES)}; built in memory instead.")
+                            except Exception as e:
+                                st.caption(f"Could not write the file ({e}); built in memory instead.")
+                        if export_file is not None:
+                            export_url, export_size, export_seconds = export_file
+                            st.markdown(
+                                f'<a class="file-download" href="{export_url}" download="{export_file_name(export_format, compression)}">'
+                                f'{export_spec["label"]}</a>',
+                                unsafe_allow_html=True
+                            )
+                            st.caption(f"{export_seconds:.2f}s · {format_bytes(export_size)}")
+                            continue
+                        try:
+                            export_data, export_seconds = cached_export(
+                                view_key, export_format, compression, filtered, start_date, end_date, dataset_type, rollup
+                            )
+                        except Exception as e:
+                            st.error(f"{export_format} export failed: {e}")
+                            continue
+                        st.download_button(
+                            export_spec["label"], data=export_data, file_name=export_file_name(export_format, compression),
+                            mime=export_mime(export_format, compression), key=f"download_{export_format}"
+                        )
+                        st.caption(f"{export_seconds:.2f}s · {format_bytes(len(export_data))}")
+            with st.expander("⚡ Excel export benchmark"):
+                st.caption("The Excel export streams rows through openpyxl's write-only mode instead of pandas' ExcelWriter.")
+                if st.button("Benchmark Excel export"):
+                    st.dataframe(excel_benchmark(filtered), hide_index=True, use_container_width=True)
             st.markdown('</div>', unsafe_allow_html=True)
 
 
@@ -702,8 +778,10 @@ st.markdown(f"""
 # Progress indicator while page elements load
 progress_bar = st.progress(0)
     
-# Latest date for metrics
-latest_date = filtered['Date_reported'].max()
+# Latest date for metrics, and each country's latest row as of it
+snapshot = view_snapshot(view_key, filtered)
+latest_date = snapshot["last_date"]
+latest_rows = as_of_rows(filtered, snapshot)
 
 # Check if we have data after filtering
 if filtered.empty:
@@ -714,38 +792,15 @@ if filtered.empty:
 progress_bar.progress(20)
 
 # ---------- KEY PERFORMANCE INDICATORS ----------
-# Extract latest metrics
-latest = filtered[filtered['Date_reported'] == latest_date]
-global_cases = int(latest['Cumulative_cases'].sum())
-global_deaths = int(latest['Cumulative_deaths'].sum())
-affected_countries = filtered['Country'].nunique()
-
-# Calculate changes from previous period
-previous_date = filtered[filtered['Date_reported'] < latest_date]['Date_reported'].max()
-if pd.notna(previous_date):
-    previous = filtered[filtered['Date_reported'] == previous_date]
-    case_change = global_cases - int(previous['Cumulative_cases'].sum())
-    death_change = global_deaths - int(previous['Cumulative_deaths'].sum())
-    case_percent = (case_change / int(previous['Cumulative_cases'].sum()) * 100) if int(previous['Cumulative_cases'].sum()) > 0 else 0
-    death_percent = (death_change / int(previous['Cumulative_deaths'].sum()) * 100) if int(previous['Cumulative_deaths'].sum()) > 0 else 0
-else:
-    case_change = death_change = case_percent = death_percent = 0
-
-# Calculate new cases based on view option
-if view_options == "Daily New" and dataset_type == "Daily":
-    new_metric = 'New_daily_cases'
-    new_deaths = 'New_daily_deaths'
-    period = "Daily"
-else:
-    new_metric = 'New_weekly_cases'
-    new_deaths = 'New_weekly_deaths'
-    period = "Weekly"
-    
-new_cases = int(latest[new_metric].sum())
-new_deaths = int(latest[new_deaths].sum())
-
-# Calculate mortality rate
-avg_mortality = (global_deaths / global_cases * 100) if global_cases > 0 else 0
+# Extract latest metrics and changes from the previous period
+kpis = kpi_snapshot(filtered, view_options, dataset_type, rollup=rollup, snapshot=snapshot)
+global_cases = kpis["global_cases"]
+global_deaths = kpis["global_deaths"]
+affected_countries = kpis["affected_countries"]
+case_change, death_change = kpis["case_change"], kpis["death_change"]
+case_percent, death_percent = kpis["case_percent"], kpis["death_percent"]
+new_cases, new_deaths, period = kpis["new_cases"], kpis["new_deaths"], kpis["period"]
+avg_mortality = kpis["avg_mortality"]
 
 # Update progress
 progress_bar.progress(30)
@@ -830,186 +885,37 @@ with tabs[0]:
     st.markdown('<div class="card">', unsafe_allow_html=True)
     st.header("Global COVID-19 Spread")
     
-    # Create map data
-    map_data = filtered.copy()
-    map_data['date'] = map_data['Date_reported'].dt.strftime('%m/%d/%Y')
-    
-    # Determine metrics based on view option
-    if view_options == "Cumulative":
-        map_metric = "Cumulative_cases"
-        map_deaths = "Cumulative_deaths"
-        title_metric = "Cumulative Cases"
-    elif view_options == "Daily New" and dataset_type == "Daily":
-        map_metric = "New_daily_cases"
-        map_deaths = "New_daily_deaths"
-        title_metric = "New Daily Cases"
-    else:  # Weekly New
-        map_metric = "New_weekly_cases"
-        map_deaths = "New_weekly_deaths"
-        title_metric = "New Weekly Cases"
-    
-    # Make bubble sizes more visually appealing
-    map_data['size'] = map_data[map_metric].clip(lower=1).pow(0.3)
-    
-    # Get ordered dates for animation
-    ordered_dates = sorted(map_data['date'].unique(), key=lambda x: pd.to_datetime(x, format='%m/%d/%Y'))
-    
-    # Sample dates to reduce frame count for smoother animations
-    if len(ordered_dates) > 30:
-        sample_step = len(ordered_dates) // 30
-        sampled_dates = ordered_dates[::sample_step]
-        if ordered_dates[-1] not in sampled_dates:
-            sampled_dates.append(ordered_dates[-1])
-    else:
-        sampled_dates = ordered_dates
-    
-    # Create map with selected color theme
-    # --- Pastel color scales for map (unified pastel) ---
-    pastel_map_scales = {
-        "Cumulative Cases": ["#eaf1ff", "#b4d8fe", "#6ea8fe"],  # blue pastel
-        "New Daily Cases": ["#fff6e8", "#ffe1b4", "#ffb86c"],    # orange pastel
-        "New Weekly Cases": ["#fff6e8", "#ffe1b4", "#ffb86c"],   # orange pastel
-    }
-    if title_metric == "Cumulative Cases":
-        map_color_scale = ["#eaf1ff", "#b4d8fe", "#6ea8fe"]
-    elif "New Daily" in title_metric:
-        map_color_scale = ["#ffe1fa", "#eabfff", "#b39ddb", "#ffd6f9", "#f6eaff"]
-    else:
-        map_color_scale = ["#fff6e8", "#ffe1b4", "#ffb86c", "#ffd6f9", "#eabfff"]
-    fig_map = px.scatter_geo(
-        map_data,
-        locations="Country",
-        locationmode='country names',
-        color=map_metric,
-        size='size',
-        hover_name="Country",
-        hover_data={
-            map_metric: True,
-            map_deaths: True,
-            "Mortality_rate": True,
-            "size": False
-        },
-        projection="natural earth",
-        animation_frame="date",
-        title=f'COVID-19: {title_metric} Over Time',
-        color_continuous_scale=map_color_scale,
-        range_color=[0, map_data[map_metric].quantile(0.95)]  # Use 95th percentile for better contrast
-    )
-    
-    # Determine if we should use dark mode for map
-    # Use Streamlit's config to determine if we're in dark mode
+    # Only the sampled frames are built, from one pass over the view; switching back to a view, metric
+    # and style already shown (in any session) reuses its figure
     is_dark_theme = st.get_option("theme.base") == "dark"
-    
-    # Set map styling based on user selection or theme
-    if map_style == "dark" or (map_style == "auto" and is_dark_theme):
-        bgcolor = "rgba(30,30,40,0.95)"
-        landcolor = "#252c36"
-        oceancolor = "#121418"
-        textcolor = "white"
-        template = "plotly_dark"
-    elif map_style == "light" or (map_style == "auto" and not is_dark_theme):
-        bgcolor = "rgba(240,242,246,0.95)"
-        landcolor = "#ebedf0"
-        oceancolor = "#f7f8fa"
-        textcolor = "black"
-        template = "plotly_white"
-    else:  # satellite
-        bgcolor = "rgba(30,30,40,0.95)"
-        landcolor = "#3b3b3b"
-        oceancolor = "#111111"
-        textcolor = "white"
-        template = "plotly_dark"
-    
-    # Enhance map appearance
-    fig_map.update_layout(
-        template=template,
-        paper_bgcolor=bgcolor,
-        geo=dict(
-            showland=True,
-            landcolor=landcolor,
-            showocean=True,
-            oceancolor=oceancolor,
-            showcountries=True,
-            countrycolor="#666666",
-            showcoastlines=False,
-            projection_type="natural earth",
-            showframe=False
-        ),
-        height=620,
-        updatemenus=[{
-            "buttons": [
-                {
-                    "args": [None, {"frame": {"duration": animation_speed, "redraw": True}, "fromcurrent": True}],
-                    "label": "▶",
-                    "method": "animate"
-                },
-                {
-                    "args": [[None], {"frame": {"duration": 0, "redraw": False}, "mode": "immediate"}],
-                    "label": "■",
-                    "method": "animate"
-                }
-            ],
-            "direction": "left",
-            "pad": {"r": 10, "t": 10},
-            "showactive": False,
-            "type": "buttons",
-            "x": 0.1,
-            "y": 0,
-            "bgcolor": "rgba(100,100,100,0.5)",
-            "font": {"color": textcolor}
-        }],
-        sliders=[{
-            "active": 0,
-            "yanchor": "top",
-            "xanchor": "left",
-            "currentvalue": {
-                "font": {"size": 16, "color": textcolor},
-                "prefix": "Date: ",
-                "visible": True,
-                "xanchor": "right"
-            },
-            "transition": {"duration": animation_speed},
-            "pad": {"b": 10, "t": 50},
-            "len": 0.9,
-            "x": 0.1,
-            "y": 0,
-            "steps": [
-                {
-                    "args": [
-                        [date],
-                        {"frame": {"duration": animation_speed, "redraw": True}, "mode": "immediate"}
-                    ],
-                    "label": date,
-                    "method": "animate"
-                } for date in sampled_dates  # Use sampled dates for better performance
-            ]
-        }]
-    )
-    
-    # Only create frames for sampled dates to improve performance
-    map_data_sampled = map_data[map_data['date'].isin(sampled_dates)]
-    fig_map.frames = [
-        go.Frame(
-            data=[go.Scattergeo(
-                locations=map_data_sampled[map_data_sampled['date'] == date]['Country'],
-                locationmode='country names',
-                marker=dict(
-                    size=map_data_sampled[map_data_sampled['date'] == date]['size'],
-                    color=map_data_sampled[map_data_sampled['date'] == date][map_metric],
-                    colorscale=map_color_scale,
-                    colorbar=dict(title=map_metric),
-                    cmin=0,
-                    cmax=map_data[map_metric].quantile(0.95)
-                )
-            )],
-            name=date
-        )
-        for date in sampled_dates
-    ]
+    map_cache = map_figure_cache()
+    map_budget = MAP_PAYLOAD_BUDGETS[map_detail]
+    map_min_share = MAP_MIN_SHARE if map_detail == "Light" else None
+    map_key = map_figure_key(view_key, view_options, map_style, animation_speed, is_dark_theme, map_budget, map_min_share)
+    map_entry = map_cache.get(map_key)
+    map_cached = map_entry is not None
+    if not map_cached:
+        map_entry = map_cache.put(map_key, build_animated_map(
+            filtered, view_options, dataset_type, map_style, animation_speed, is_dark_theme=is_dark_theme,
+            budget_bytes=map_budget, min_share=map_min_share
+        ))
+    fig_map, map_build = map_entry
     
     # Render map with loading indicator
     with st.spinner("Rendering map..."):
         st.plotly_chart(fig_map, use_container_width=True)
+    map_stats = map_cache.stats()
+    left_out = f" ({map_build['dropped_countries']:,} minor countries left out)" if map_build['dropped_countries'] else ""
+    if map_build['unlocated_countries']:
+        left_out += f" · not mapped: {map_build['unlocated_countries']} without a map location"
+    st.caption(
+        f"Map {'from cache (built' if map_cached else 'built'} in {map_build['build_seconds']:.2f}s"
+        f"{')' if map_cached else ''} · {map_build['frames']} frames, "
+        f"{map_build['markers']:,} markers{left_out} · "
+        f"figure JSON {format_bytes(map_build['json_bytes'])} of {format_bytes(map_budget)} budget · "
+        f"map cache {map_stats['hits']:,} hits / {map_stats['misses']:,} misses, "
+        f"{format_bytes(map_stats['bytes'])} of {format_bytes(map_stats['max_bytes'])}"
+    )
     
     st.info("💡 **Pro Tip:** Use the play button to animate the map through time, or click on specific dates in the slider to jump to that point.")
     
@@ -1034,12 +940,8 @@ with tabs[1]:
         top_metrics = ['New_weekly_cases', 'New_weekly_deaths']
         title_prefix = "New Weekly"
         
-    # Get data for the latest date for each country
-    latest_by_country = filtered.sort_values('Date_reported').groupby('Country').last().reset_index()
-    
-    # Find top 10 countries by cases
-    top_by_cases = latest_by_country.sort_values(top_metrics[0], ascending=False).head(10)
-    top_by_cases['Mortality_rate'] = (top_by_cases['Cumulative_deaths'] / top_by_cases['Cumulative_cases'] * 100).round(2)
+    # Find top 10 countries by cases on their latest report
+    top_by_cases = top_countries(filtered, top_metrics[0], n=10, rollup=rollup, snapshot=snapshot)
     
     col_top1, col_top2 = st.columns(2)
     
@@ -1175,46 +1077,69 @@ with tabs[1]:
 progress_bar.progress(70)
 
 # ---------- TRENDS TAB ----------
+def trend_label(days):
+    return f"{days}-day" if dataset_type == "Daily" else f"{window_rows(days, dataset_type)}-wk"
+
+def add_trend_lines(fig, timeline, cases_col, deaths_col):
+    """
+    Moving-average lines of the cases and deaths columns, one pair per selected trend window
+    """
+    for days, dash in zip(sorted(trend_windows_days), ['solid', 'dash', 'dot']):
+        rows = window_rows(days, dataset_type)
+        if rolling_column(cases_col, 'mean', rows) not in timeline.columns:
+            continue
+        fig.add_trace(
+            go.Scatter(
+                x=timeline['Date_reported'],
+                y=timeline[rolling_column(cases_col, 'mean', rows)],
+                name=f"Cases Trend ({trend_label(days)} MA)",
+                line=dict(color="#6ea8fe", width=3, dash=dash)
+            )
+        )
+        fig.add_trace(
+            go.Scatter(
+                x=timeline['Date_reported'],
+                y=timeline[rolling_column(deaths_col, 'mean', rows)],
+                name=f"Deaths Trend ({trend_label(days)} MA)",
+                line=dict(color="#7ed96e", width=3, dash=dash)
+            ),
+            secondary_y=True
+        )
+
+def growth_text(growth):
+    # growth is the ratio of the latest window to the one before: infinite when that window was empty
+    if pd.isna(growth):
+        return "n/a"
+    if np.isinf(growth):
+        return "up from 0"
+    return f"{growth - 1:+.1%}"
+
+def trend_growth_caption(timeline, cases_col, deaths_col):
+    """
+    Latest window-over-window growth of cases and deaths for each selected trend window
+    """
+    parts = []
+    for days in sorted(trend_windows_days):
+        rows = window_rows(days, dataset_type)
+        if rolling_column(cases_col, 'growth', rows) not in timeline.columns or timeline.empty:
+            continue
+        cases_growth = timeline[rolling_column(cases_col, 'growth', rows)].iloc[-1]
+        deaths_growth = timeline[rolling_column(deaths_col, 'growth', rows)].iloc[-1]
+        if pd.notna(cases_growth) or pd.notna(deaths_growth):
+            parts.append(
+                f"{trend_label(days)}: cases {growth_text(cases_growth)}, deaths {growth_text(deaths_growth)}"
+            )
+    if parts:
+        st.caption("Growth over the latest window vs the one before · " + " · ".join(parts))
+
 with tabs[2]:
     st.markdown('<div class="card">', unsafe_allow_html=True)
     st.header("Global Trends Over Time")
     
-    # Create timeline data - optimize by grouping first
-    timeline_metrics = {
-        'Cumulative_cases': 'sum',
-        'Cumulative_deaths': 'sum',
-    }
-    
-    # Add appropriate metrics based on dataset type
-    if dataset_type == "Daily":
-        timeline_metrics.update({
-            'New_daily_cases': 'sum',
-            'New_daily_deaths': 'sum',
-            'New_weekly_cases': 'sum',
-            'New_weekly_deaths': 'sum'
-        })
-    else:
-        timeline_metrics.update({
-            'New_weekly_cases': 'sum',
-            'New_weekly_deaths': 'sum'
-        })
-    
-    # Calculate aggregates more efficiently
+    # Calculate aggregates and rolling statistics for every selected window in one pass
+    trend_rows = sorted({window_rows(days, dataset_type) for days in trend_windows_days})
     with st.spinner("Calculating trends..."):
-        timeline = filtered.groupby('Date_reported').agg(timeline_metrics).reset_index()
-        timeline = timeline.sort_values('Date_reported')
-    
-    # Calculate moving averages for trend lines if enabled
-    if show_trends:
-        window_size = 7 if dataset_type == "Daily" else 4
-        if len(timeline) >= window_size:
-            if dataset_type == "Daily" and 'New_daily_cases' in timeline.columns:
-                timeline['Cases_MA'] = timeline['New_daily_cases'].rolling(window=window_size, min_periods=1).mean()
-                timeline['Deaths_MA'] = timeline['New_daily_deaths'].rolling(window=window_size, min_periods=1).mean()
-            
-            if 'New_weekly_cases' in timeline.columns:
-                timeline['Weekly_Cases_MA'] = timeline['New_weekly_cases'].rolling(window=min(window_size, len(timeline)//2 or 1), min_periods=1).mean()
-                timeline['Weekly_Deaths_MA'] = timeline['New_weekly_deaths'].rolling(window=min(window_size, len(timeline)//2 or 1), min_periods=1).mean()
+        timeline = trend_timeline(filtered, dataset_type, show_trends, rollup=rollup, windows=trend_rows)
     
     # Create interactive time series charts based on view options
     if view_options == "Cumulative":
@@ -1312,24 +1237,8 @@ with tabs[2]:
         )
         
         # Add trend lines if enabled
-        if show_trends and 'Cases_MA' in timeline.columns:
-            fig_daily.add_trace(
-                go.Scatter(
-                    x=timeline['Date_reported'], 
-                    y=timeline['Cases_MA'],
-                    name="Cases Trend (7-day MA)",
-                    line=dict(color="#6ea8fe", width=3, dash='solid')
-                )
-            )
-            fig_daily.add_trace(
-                go.Scatter(
-                    x=timeline['Date_reported'], 
-                    y=timeline['Deaths_MA'],
-                    name="Deaths Trend (7-day MA)",
-                    line=dict(color="#7ed96e", width=3, dash='solid')
-                ),
-                secondary_y=True
-            )
+        if show_trends:
+            add_trend_lines(fig_daily, timeline, 'New_daily_cases', 'New_daily_deaths')
         
         # Update layout
         fig_daily.update_layout(
@@ -1372,6 +1281,8 @@ with tabs[2]:
         )
         
         st.plotly_chart(fig_daily, use_container_width=True)
+        if show_trends:
+            trend_growth_caption(timeline, 'New_daily_cases', 'New_daily_deaths')
     
     else:  # Weekly New (available in both dataset types)
         # Weekly new cases and deaths chart
@@ -1397,24 +1308,8 @@ with tabs[2]:
         )
         
         # Add trend lines if enabled
-        if show_trends and 'Weekly_Cases_MA' in timeline.columns:
-            fig_weekly.add_trace(
-                go.Scatter(
-                    x=timeline['Date_reported'], 
-                    y=timeline['Weekly_Cases_MA'],
-                    name="Cases Trend (4-wk MA)",
-                    line=dict(color="#6ea8fe", width=3, dash='solid')
-                )
-            )
-            fig_weekly.add_trace(
-                go.Scatter(
-                    x=timeline['Date_reported'], 
-                    y=timeline['Weekly_Deaths_MA'],
-                    name="Deaths Trend (4-wk MA)",
-                    line=dict(color="#7ed96e", width=3, dash='solid')
-                ),
-                secondary_y=True
-            )
+        if show_trends:
+            add_trend_lines(fig_weekly, timeline, 'New_weekly_cases', 'New_weekly_deaths')
         
         # Update layout
         fig_weekly.update_layout(
@@ -1457,26 +1352,15 @@ with tabs[2]:
         )
         
         st.plotly_chart(fig_weekly, use_container_width=True)
+        if show_trends:
+            trend_growth_caption(timeline, 'New_weekly_cases', 'New_weekly_deaths')
     
     # Create a stacked area chart for cases by WHO region
     st.subheader("Regional Breakdown Over Time")
     
     # More efficient data aggregation for regions
     with st.spinner("Calculating regional breakdown..."):
-        region_metrics = {
-            'Cumulative_cases': 'sum',
-            'Cumulative_deaths': 'sum',
-            'New_weekly_cases': 'sum',
-            'New_weekly_deaths': 'sum'
-        }
-        
-        if dataset_type == "Daily":
-            region_metrics.update({
-                'New_daily_cases': 'sum',
-                'New_daily_deaths': 'sum'
-            })
-            
-        region_timeline = filtered.groupby(['Date_reported', 'WHO_region']).agg(region_metrics).reset_index()
+        region_timeline = regional_timeline(filtered, dataset_type, rollup=rollup)
     
     # Select metric based on view options
     if view_options == "Cumulative":
@@ -1518,6 +1402,39 @@ with tabs[2]:
     
     st.plotly_chart(fig_region_area, use_container_width=True)
     
+    # Moving averages per region for every selected window, from one rolling pass over the regional timeline
+    if show_trends and trend_rows:
+        trend_metric = new_count_columns(view_options, dataset_type)[0]
+        with st.spinner("Calculating regional trends..."):
+            region_trends = regional_trends(filtered, dataset_type, [trend_metric], trend_rows, rollup=rollup)
+        region_trend_lines = pd.concat([
+            pd.DataFrame({
+                'Date_reported': region_trends['Date_reported'],
+                'WHO_region': region_trends['WHO_region'].astype(str),
+                'Window': f"{trend_label(days)} MA",
+                'Moving_average': region_trends[rolling_column(trend_metric, 'mean', window_rows(days, dataset_type))],
+            })
+            for days in sorted(trend_windows_days)
+        ], ignore_index=True)
+        fig_region_trends = px.line(
+            region_trend_lines,
+            x='Date_reported',
+            y='Moving_average',
+            color='WHO_region',
+            line_dash='Window',
+            title=f"{trend_metric.replace('_', ' ').title()} Trend by WHO Region",
+            color_discrete_sequence=pastel_region_palette,
+            log_y=log_scale,
+            height=450
+        )
+        fig_region_trends.update_layout(
+            xaxis_title="Date",
+            yaxis_title="Moving Average",
+            hovermode="x unified",
+            legend=dict(orientation="h", yanchor="top", y=-0.15, xanchor="left", x=0),
+        )
+        st.plotly_chart(fig_region_trends, use_container_width=True)
+    
     st.markdown('</div>', unsafe_allow_html=True)
 
 # Update progress
@@ -1530,26 +1447,7 @@ with tabs[3]:
     
     # Calculate region summary - more efficiently
     with st.spinner("Analyzing regional data..."):
-        region_summary_metrics = {
-            'Country': 'nunique',
-            'Cumulative_cases': 'sum',
-            'Cumulative_deaths': 'sum',
-            'New_weekly_cases': 'sum',
-            'New_weekly_deaths': 'sum'
-        }
-        
-        if dataset_type == "Daily":
-            region_summary_metrics.update({
-                'New_daily_cases': 'sum',
-                'New_daily_deaths': 'sum'
-            })
-            
-        region_summary = filtered[filtered['Date_reported']==latest_date].groupby('WHO_region').agg(
-            region_summary_metrics
-        ).reset_index().rename(columns={'Country': 'Countries'})
-        
-        region_summary['Mortality_rate'] = (region_summary['Cumulative_deaths'] / region_summary['Cumulative_cases'] * 100).round(2)
-        region_summary = region_summary.sort_values('Cumulative_cases', ascending=False)
+        region_summary = regional_summary(filtered, latest_date, dataset_type, rollup=rollup)
     
     # Create continent mapping
     continent_mapping = {
@@ -1643,7 +1541,7 @@ with tabs[3]:
     with st.spinner("Preparing hierarchical visualization..."):
         try:
             # Get the latest data
-            treemap_base = filtered[filtered['Date_reported'] == latest_date].copy()
+            treemap_base = float_counts(latest_rows)
             # Add continent information
             treemap_base['Continent'] = treemap_base['WHO_region'].map(continent_mapping)
             # Rename columns for visualization clarity
@@ -1666,9 +1564,9 @@ with tabs[3]:
                 treemap_title = "New Weekly COVID-19 Cases"
 
             # --- Null handling for treemap path columns and values ---
-            treemap_data['Continent'] = treemap_data['Continent'].fillna('Other').astype(str)
-            treemap_data['WHO_region'] = treemap_data['WHO_region'].fillna('Other').astype(str)
-            treemap_data['Country_Name'] = treemap_data['Country_Name'].fillna('Unknown').astype(str)
+            treemap_data['Continent'] = treemap_data['Continent'].astype(object).fillna('Other').astype(str)
+            treemap_data['WHO_region'] = treemap_data['WHO_region'].astype(object).fillna('Other').astype(str)
+            treemap_data['Country_Name'] = treemap_data['Country_Name'].astype(object).fillna('Unknown').astype(str)
             treemap_data[treemap_metric] = treemap_data[treemap_metric].fillna(0)
             # --------------------------------------------------------
 
@@ -1696,10 +1594,7 @@ with tabs[3]:
             # Fallback: Show a simpler visualization that doesn't rely on hierarchical paths
             st.subheader("Alternative Regional View")
             # Create a horizontal bar chart instead
-            region_data = filtered[filtered['Date_reported'] == latest_date].groupby('WHO_region').agg({
-                'Cumulative_cases': 'sum',
-                'Cumulative_deaths': 'sum'
-            }).reset_index().sort_values('Cumulative_cases')
+            region_data = float_counts(region_summary.sort_values('Cumulative_cases'))
             fig_bar = px.bar(
                 region_data,
                 y='WHO_region',
@@ -1720,37 +1615,10 @@ with tabs[3]:
     # Regional summary table with improved styling for both light and dark mode
     st.subheader("WHO Regional Summary")
     
-    # Format the table
-    formatted_summary = region_summary.copy()
-    for col in formatted_summary.columns:
-        if col in ['Cumulative_cases', 'Cumulative_deaths', 'New_weekly_cases', 'New_weekly_deaths']:
-            formatted_summary[col] = formatted_summary[col].apply(lambda x: f"{int(x):,}")
-        
-        if dataset_type == "Daily" and col in ['New_daily_cases', 'New_daily_deaths']:
-            formatted_summary[col] = formatted_summary[col].apply(lambda x: f"{int(x):,}")
-            
-    formatted_summary['Mortality_rate'] = formatted_summary['Mortality_rate'].apply(lambda x: f"{x:.2f}%")
-    
-    # Rename columns for better display
-    rename_dict = {
-        'Countries': 'Countries Affected',
-        'Cumulative_cases': 'Total Cases',
-        'Cumulative_deaths': 'Total Deaths',
-        'New_weekly_cases': 'Weekly New Cases',
-        'New_weekly_deaths': 'Weekly New Deaths',
-        'Mortality_rate': 'Mortality Rate',
-        'WHO_region': 'WHO Region'
-    }
-    
-    if dataset_type == "Daily":
-        rename_dict.update({
-            'New_daily_cases': 'Daily New Cases',
-            'New_daily_deaths': 'Daily New Deaths'
-        })
-    
-    # Display the enhanced table
+    # Counts stay numeric; labels and the mortality format are applied by the grid
     st.dataframe(
-        formatted_summary.rename(columns=rename_dict),
+        region_summary,
+        column_config=table_column_config(region_summary.columns, COLUMN_LABELS),
         use_container_width=True,
         height=300
     )
@@ -1766,10 +1634,11 @@ with tabs[4]:
     st.header("Interactive Country Explorer")
     
     # Allow selecting specific countries to compare
+    view_countries = sorted(latest_rows['Country'].astype(str))
     compare_countries = st.multiselect(
         "Select Countries to Compare",
-        options=sorted(filtered['Country'].unique()),
-        default=sorted(filtered['Country'].unique())[:5] if len(filtered['Country'].unique()) > 5 else sorted(filtered['Country'].unique()),
+        options=view_countries,
+        default=view_countries[:5],
         help="Choose countries to compare (limit to 5-10 for better visualization)"
     )
     
@@ -1777,7 +1646,7 @@ with tabs[4]:
         st.warning("Please select at least one country to explore.")
     else:
         # Get data for selected countries
-        country_data = filtered[filtered['Country'].isin(compare_countries)].copy()
+        country_data = float_counts(filtered[filtered['Country'].isin(compare_countries)])
         
         # Determine metrics based on view options
         if view_options == "Cumulative":
@@ -1888,13 +1757,6 @@ with tabs[4]:
         # Create radar chart for multi-dimensional comparison
         st.subheader("Multi-dimensional Country Comparison")
         
-        # Get the latest data for each selected country
-        latest_country_data = country_data.groupby('Country').apply(lambda x: x[x['Date_reported'] == x['Date_reported'].max()]).reset_index(drop=True)
-        
-        # Normalize data for radar chart
-        radar_data = latest_country_data.copy()
-        normalized_cols = []
-        
         # Choose columns to include based on dataset type
         if dataset_type == "Daily":
             radar_metrics = ['Cumulative_cases', 'Cumulative_deaths', 'New_daily_cases', 'New_daily_deaths', 'Mortality_rate']
@@ -1903,30 +1765,23 @@ with tabs[4]:
             radar_metrics = ['Cumulative_cases', 'Cumulative_deaths', 'New_weekly_cases', 'New_weekly_deaths', 'Mortality_rate']
             radar_labels = ['Total Cases', 'Total Deaths', 'New Weekly Cases', 'New Weekly Deaths', 'Mortality Rate']
         
-        # Perform normalization for each metric
-        for col in radar_metrics:
-            max_val = radar_data[col].max()
-            if max_val > 0:  # Avoid division by zero
-                radar_data[f'{col}_norm'] = (radar_data[col] / max_val) * 100
-            else:
-                radar_data[f'{col}_norm'] = 0
-            normalized_cols.append(f'{col}_norm')
-        
-        # Create radar chart
-        fig_radar = go.Figure()
+        # Latest row of each selected country, normalized across all metrics at once
+        radar_countries, radar_values = radar_matrix(latest_rows[latest_rows['Country'].isin(compare_countries)], radar_metrics)
         
         # Define colors for radar chart - unified pastel colors
         radar_colors = ['#6ea8fe', '#ffb86c', '#ff7b7b', '#7ed96e', '#b39ddb', '#b4d8fe', '#ffc9c9', '#ffd6f9', '#eabfff']
-        for i, country in enumerate(radar_data['Country'].unique()):
-            country_row = radar_data[radar_data['Country'] == country].iloc[0]
-            fig_radar.add_trace(go.Scatterpolar(
-                r=[country_row[f'{col}_norm'] for col in radar_metrics],
+        # One trace per country straight from its row of the normalized array
+        fig_radar = go.Figure(data=[
+            go.Scatterpolar(
+                r=radar_values[i],
                 theta=radar_labels,
                 fill='toself',
                 name=country,
                 line_color=radar_colors[i % len(radar_colors)],
                 fillcolor=hex_to_rgba(radar_colors[i % len(radar_colors)], 0.20)
-            ))
+            )
+            for i, country in enumerate(radar_countries)
+        ])
         
         # Use neutral grid colors that work in both light and dark mode
         grid_color = "rgba(128, 128, 128, 0.2)"
@@ -1968,52 +1823,52 @@ with tabs[5]:
     st.markdown('<div class="card">', unsafe_allow_html=True)
     st.header("Detailed Data Table & Export")
     # Add options for data display
+    table_choices = ["All Data", "Latest Date Only", "Summary by Country", "Summary by WHO Region"]
+    if dataset_type == "Daily":
+        table_choices.append("Weekly Rollup")
     table_options = st.radio(
         "Choose data to display:",
-        options=["All Data", "Latest Date Only", "Summary by Country", "Summary by WHO Region"],
+        options=table_choices,
         horizontal=True
     )
     # Prepare data based on selection
+    paged = table_options in ("All Data", "Weekly Rollup")
     with st.spinner("Preparing data table..."):
         if table_options == "All Data":
-            display_data = filtered.sort_values(['Date_reported', 'Country'])
+            display_data = filtered
+        elif table_options == "Weekly Rollup":
+            display_data = weekly_view(filtered)
         elif table_options == "Latest Date Only":
-            display_data = filtered[filtered['Date_reported'] == latest_date].sort_values('Country')
+            display_data = latest_rows[latest_rows['Date_reported'] == latest_date]
         elif table_options == "Summary by Country":
-            agg_metrics = {
-                'WHO_region': 'first',
-                'Cumulative_cases': 'max',
-                'Cumulative_deaths': 'max',
-                'New_weekly_cases': 'sum',
-                'New_weekly_deaths': 'sum',
-                'Mortality_rate': 'max'
-            }
-            if dataset_type == "Daily":
-                agg_metrics.update({
-                    'New_daily_cases': 'sum',
-                    'New_daily_deaths': 'sum'
-                })
-            display_data = filtered.groupby('Country').agg(agg_metrics).reset_index().sort_values('Cumulative_cases', ascending=False)
+            display_data = country_summary(filtered, dataset_type, rollup=rollup)
         else:
-            region_agg_metrics = {
-                'Country': 'nunique',
-                'Cumulative_cases': 'sum',
-                'Cumulative_deaths': 'sum',
-                'New_weekly_cases': 'sum',
-                'New_weekly_deaths': 'sum'
-            }
-            if dataset_type == "Daily":
-                region_agg_metrics.update({
-                    'New_daily_cases': 'sum',
-                    'New_daily_deaths': 'sum'
-                })
-            display_data = filtered.groupby(['WHO_region', 'Date_reported']).agg(region_agg_metrics).reset_index()
-            display_data['Mortality_rate'] = (display_data['Cumulative_deaths'] / display_data['Cumulative_cases'] * 100).round(2)
-            display_data = display_data.rename(columns={'Country': 'Countries'}).sort_values(['WHO_region', 'Date_reported'])
+            display_data = region_date_summary(filtered, dataset_type, rollup=rollup)
 
-    # --- Use st_aggrid for enhanced table if available ---
     table_height = 450
-    if AgGrid is not None:
+    if paged:
+        # Row-level views are paged on the server: sorting and searching produce row positions once,
+        # and only the visible page is sent to the browser
+        sort_col, order_col, search_col, size_col, page_col = st.columns([2, 1, 2, 1, 1])
+        sort_column = sort_col.selectbox("Sort by", list(display_data.columns), index=list(display_data.columns).index('Date_reported'))
+        ascending = order_col.radio("Order", ["Ascending", "Descending"], label_visibility="hidden") == "Ascending"
+        search = search_col.text_input("Search country", placeholder="e.g. india").strip()
+        page_size = size_col.selectbox("Rows per page", TABLE_PAGE_SIZES, index=1)
+        positions = table_order(view_key, table_options, sort_column, ascending, search, display_data)
+        page_count = max(-(-len(positions) // page_size), 1)
+        # A fixed label and key keep the widget (and its page) when the page count changes; the stored page
+        # is clamped before the widget is created
+        st.session_state["table_page"] = min(max(int(st.session_state.get("table_page", 1)), 1), page_count)
+        page = page_col.number_input("Page", min_value=1, max_value=page_count, step=1, key="table_page")
+        page_rows, page, page_count = table_page(display_data, positions, page, page_size)
+        st.dataframe(page_rows, column_config=table_column_config(page_rows.columns), use_container_width=True, height=table_height)
+        first_row = (page - 1) * page_size
+        st.caption(
+            f"Showing rows {min(first_row + 1, len(positions)):,}–{first_row + len(page_rows):,} of {len(positions):,} "
+            f"matching records ({len(display_data):,} in view) · page {page:,} of {page_count:,}"
+        )
+    # --- Use st_aggrid for enhanced table if available ---
+    elif AgGrid is not None:
         gb = GridOptionsBuilder.from_dataframe(display_data)
         gb.configure_pagination(paginationAutoPageSize=False, paginationPageSize=20)
         gb.configure_default_column(editable=False, groupable=True, filter=True, sortable=True, resizable=True)
@@ -2034,11 +1889,13 @@ with tabs[5]:
     else:
         st.dataframe(
             display_data,
+            column_config=table_column_config(display_data.columns),
             use_container_width=True,
             height=table_height
         )
 
-    st.caption(f"Showing {len(display_data):,} records")
+    if not paged:
+        st.caption(f"Showing {len(display_data):,} records")
 
     # Export options
     # (Download Analytics now handled in sidebar after filters are applied)
@@ -2057,6 +1914,16 @@ with tabs[5]:
         * **New_weekly_deaths**: New deaths reported in the last 7 days
         * **Mortality_rate**: Deaths as a percentage of cases (Cumulative_deaths / Cumulative_cases * 100)
         """)
+    # Countries whose cumulative counts were revised downwards (new counts clipped to 0 on those dates)
+    corrections = load_info.get("corrections")
+    if corrections:
+        with st.expander(f"Reporting Corrections ({len(corrections)} countries)", expanded=False):
+            st.dataframe(
+                pd.DataFrame.from_dict(corrections, orient='index')
+                .rename(columns={'Cumulative_cases': 'Case Corrections', 'Cumulative_deaths': 'Death Corrections'})
+                .sort_values('Case Corrections', ascending=False),
+                use_container_width=True
+            )
     st.markdown('</div>', unsafe_allow_html=True)
 
 # ---------- FORECASTING (AI PREDICTIONS) TAB ----------
@@ -2064,56 +1931,69 @@ with tabs[6]:
     st.markdown('<div class="card">', unsafe_allow_html=True)
     st.header("🧠 Forecasting (AI Predictions)")
     st.markdown("Predict the next 14 days of COVID-19 metrics for selected countries using Prophet (if available) or ARIMA. Cumulative and new metrics are handled automatically.<br><span style='opacity:0.7;'>Hover over chart lines for more details.</span>", unsafe_allow_html=True)
-    # --- Enforce max 3 countries ---
+    forecast_options = sorted(filtered['Country'].unique())
     forecast_countries = st.multiselect(
-        "Select countries for forecasting (max 3):",
-        options=sorted(filtered['Country'].unique()),
-        default=sorted(filtered['Country'].unique())[:2],
-        help="Choose up to 3 countries for best performance.",
-        max_selections=3 if hasattr(st, "multiselect") and "max_selections" in st.multiselect.__code__.co_varnames else None
+        f"Select countries for forecasting (max {FORECAST_MAX_COUNTRIES}):",
+        options=forecast_options,
+        default=forecast_options[:2],
+        help="Models are fitted in parallel worker processes; each chart appears as soon as its fit finishes.",
+        max_selections=FORECAST_MAX_COUNTRIES if hasattr(st, "multiselect") and "max_selections" in st.multiselect.__code__.co_varnames else None
     )
-    if len(forecast_countries) > 3:
-        st.warning("⚠️ You can select up to 3 countries only.")
-        forecast_countries = forecast_countries[:3]
+    if len(forecast_countries) > FORECAST_MAX_COUNTRIES:
+        st.warning(f"⚠️ You can select up to {FORECAST_MAX_COUNTRIES} countries only.")
+        forecast_countries = forecast_countries[:FORECAST_MAX_COUNTRIES]
     forecast_metric = st.selectbox(
         "Metric to forecast:",
         options=["Cumulative_cases", "Cumulative_deaths", "New_weekly_cases", "New_weekly_deaths"],
         index=0,
         help="Choose a metric to forecast."
     )
-    st.caption("Forecasts include upper/lower confidence intervals. ARIMA fallback is robust for small datasets (≥10 rows).")
+    if forecast_time_limited(forecast_pool()):
+        fit_limit = f"Each model may take up to {FORECAST_TIMEOUT_SECONDS}s to fit."
+    else:
+        fit_limit = (
+            f"Fits run in threads on this server and have no timeout: a forecast still running after "
+            f"{4 * FORECAST_TIMEOUT_SECONDS}s is reported as unfinished but keeps its thread busy."
+        )
+    st.caption(
+        "Forecasts include upper/lower confidence intervals. ARIMA fallback is robust for small datasets (≥10 rows). "
+        + fit_limit
+    )
     if forecast_countries:
-        for country in forecast_countries:
-            with st.spinner(f"Generating forecast for {country}..."):
-                st.subheader(f"Forecast for {country} ({forecast_metric})")
-                country_df = filtered[filtered['Country'] == country][['Date_reported', forecast_metric]].copy()
-                country_df = country_df.rename(columns={'Date_reported': 'ds', forecast_metric: 'y'})
-                country_df['y'] = country_df['y'].fillna(0)
-                # Adapt for cumulative: only positive, for new: allow zeros
-                if "Cumulative" in forecast_metric:
-                    country_df = country_df[country_df['y'] > 0]
-                # For very small datasets, warn or fallback
-                if len(country_df) < 10:
-                    st.warning("Dataset is very small. Forecasts may be unreliable.")
-                # Try Prophet, fallback to ARIMA if not available or fails
-                forecast_success = False
-                prophet_error = None
-                if Prophet is not None and len(country_df) >= 2:
+        # One slot per country in selection order, filled as the worker processes finish
+        slots = {country: st.container() for country in forecast_countries}
+        histories = {country: forecast_history(filtered, country, forecast_metric) for country in forecast_countries}
+        forecast_progress = st.progress(0, text=f"Fitting {len(histories)} forecast(s)...")
+        pool, stalled = None, False
+        try:
+            pool = forecast_pool()
+            for done, (country, result) in enumerate(
+                iter_forecasts(histories, cumulative="Cumulative" in forecast_metric, executor=pool), start=1
+            ):
+                forecast_progress.progress(done / len(histories), text=f"Fitted {done} of {len(histories)} forecast(s) · {country}")
+                stalled = stalled or result.get("stalled", False)
+                with slots[country]:
+                    st.subheader(f"Forecast for {country} ({forecast_metric})")
                     try:
-                        m = Prophet()
-                        m.fit(country_df)
-                        future = m.make_future_dataframe(periods=14)
-                        forecast = m.predict(future)
+                        # For very small datasets, warn or fallback
+                        if len(histories[country]) < 10:
+                            st.warning("Dataset is very small. Forecasts may be unreliable.")
+                        for level, message in result["notes"]:
+                            (st.warning if level == "warning" else st.error)(message)
+                        if result["model"] is None:
+                            continue
+                        history, forecast, model_name = result["history"], result["forecast"], result["model"]
+                        forecast_name = "Forecast" if model_name == "Prophet" else f"Forecast ({model_name})"
                         # Plotly visualization with confidence intervals
                         fig = go.Figure()
                         fig.add_trace(go.Scatter(
-                            x=country_df['ds'], y=country_df['y'],
+                            x=history['ds'], y=history['y'],
                             mode='lines+markers', name='Historical', line=dict(color="#3b82f6"),
                             hovertemplate='Date: %{x|%b %d, %Y}<br>Value: %{y:,.0f}<extra></extra>'
                         ))
                         fig.add_trace(go.Scatter(
                             x=forecast['ds'], y=forecast['yhat'],
-                            mode='lines', name='Forecast', line=dict(color="#10b981", dash='dash'),
+                            mode='lines', name=forecast_name, line=dict(color="#10b981", dash='dash'),
                             hovertemplate='Date: %{x|%b %d, %Y}<br>Forecast: %{y:,.0f}<extra></extra>'
                         ))
                         fig.add_trace(go.Scatter(
@@ -2128,77 +2008,29 @@ with tabs[6]:
                             hovertemplate='Lower Bound: %{y:,.0f}<extra></extra>'
                         ))
                         fig.update_layout(
-                            title=f"{country} - {forecast_metric.replace('_',' ')} (14-Day Forecast, Prophet)",
-                            xaxis_title="Date",
-                            yaxis_title=forecast_metric.replace("_", " "),
-                            height=400,
-                            template="plotly_white"
-                        )
-                        st.plotly_chart(fig, use_container_width=True)
-                        forecast_success = True
-                    except Exception as e:
-                        prophet_error = e
-                else:
-                    prophet_error = "Prophet not installed or insufficient data"
-                if not forecast_success:
-                    st.warning(f"Prophet not available or failed ({prophet_error}). Using ARIMA model as fallback.")
-                    arima_df = country_df.copy().sort_values('ds')
-                    y = arima_df['y'].values
-                    if len(y) < 10 or np.all(y == y[0]):
-                        st.error("Not enough data or no variation for ARIMA forecasting.")
-                        continue
-                    try:
-                        order = (1, 1, 1) if "Cumulative" in forecast_metric else (2, 0, 2)
-                        model = ARIMA(y, order=order)
-                        model_fit = model.fit()
-                        forecast_result = model_fit.get_forecast(steps=14)
-                        forecast_values = forecast_result.predicted_mean
-                        conf_int = forecast_result.conf_int()
-                        if hasattr(conf_int, "to_numpy"):
-                            conf_array = conf_int.to_numpy()
-                        else:
-                            conf_array = np.array(conf_int)
-                        if conf_array.ndim == 1:
-                            conf_array = np.column_stack((conf_array, conf_array))
-                        upper_bound = conf_array[:, -1]
-                        lower_bound = conf_array[:, 0]
-                        last_date = pd.to_datetime(arima_df['ds'].iloc[-1])
-                        freq = pd.infer_freq(arima_df['ds'])
-                        if freq is None:
-                            freq = "D"
-                        forecast_dates = pd.date_range(last_date + pd.Timedelta(days=1), periods=14, freq=freq)
-                        fig = go.Figure()
-                        fig.add_trace(go.Scatter(
-                            x=arima_df['ds'], y=arima_df['y'],
-                            mode='lines+markers', name='Historical', line=dict(color="#3b82f6"),
-                            hovertemplate='Date: %{x|%b %d, %Y}<br>Value: %{y:,.0f}<extra></extra>'
-                        ))
-                        fig.add_trace(go.Scatter(
-                            x=forecast_dates, y=forecast_values,
-                            mode='lines', name='Forecast (ARIMA)', line=dict(color="#10b981", dash='dash'),
-                            hovertemplate='Date: %{x|%b %d, %Y}<br>Forecast: %{y:,.0f}<extra></extra>'
-                        ))
-                        fig.add_trace(go.Scatter(
-                            x=forecast_dates, y=upper_bound,
-                            mode='lines', name='Upper Bound', line=dict(color="#a7f3d0", width=0.5), showlegend=True,
-                            hovertemplate='Upper Bound: %{y:,.0f}<extra></extra>'
-                        ))
-                        fig.add_trace(go.Scatter(
-                            x=forecast_dates, y=lower_bound,
-                            mode='lines', name='Lower Bound', line=dict(color="#a7f3d0", width=0.5),
-                            fill='tonexty', fillcolor='rgba(16,185,129,0.1)', showlegend=True,
-                            hovertemplate='Lower Bound: %{y:,.0f}<extra></extra>'
-                        ))
-                        fig.update_layout(
-                            title=f"{country} - {forecast_metric.replace('_',' ')} (14-Day Forecast, ARIMA)",
+                            title=f"{country} - {forecast_metric.replace('_',' ')} (14-Day Forecast, {model_name})",
                             xaxis_title="Date",
                             yaxis_title=forecast_metric.replace("_", " "),
                             height=400,
                             template="plotly_white"
                         )
                         st.plotly_chart(fig, use_container_width=True)
+                        st.caption(f"Fitted in {result['seconds']:.2f}s")
                     except Exception as e:
-                        st.error(f"ARIMA forecasting failed for {country}: {e}")
+                        st.error(f"Could not show the forecast for {country}: {e}")
+            forecast_progress.empty()
+            if stalled:
+                # A stuck worker keeps its slot in the pool; kill the workers, then let the next run start a fresh pool
+                stop_forecast_executor(pool)
+                forecast_pool.clear()
+        except BrokenProcessPool as e:
+            # A worker that died takes the pool with it; the next run starts a fresh one
+            if pool is not None:
+                stop_forecast_executor(pool)
+            forecast_pool.clear()
+            st.error(f"Forecasting failed: {e}")
+        except Exception as e:
+            st.error(f"Forecasting failed: {e}")
     else:
         st.info("Select at least one country to view forecasts.")
     st.markdown('</div>', unsafe_allow_html=True)
@@ -2209,16 +2041,7 @@ with tabs[7]:
     st.header("📊 Statistical Insights")
     st.markdown("Explore correlations and relationships between major metrics. <span style='opacity:0.7;'>Hover over heatmap for details.</span>", unsafe_allow_html=True)
     # Select columns to correlate
-    corr_cols = [
-        col for col in [
-            'Cumulative_cases', 'Cumulative_deaths', 'New_weekly_cases', 'New_weekly_deaths',
-            'Mortality_rate'
-        ] if col in filtered.columns
-    ]
-    if dataset_type == "Daily":
-        corr_cols += [col for col in ['New_daily_cases', 'New_daily_deaths'] if col in filtered.columns]
-    corr_cols = list(dict.fromkeys(corr_cols))
-    corr_data = filtered[corr_cols].dropna()
+    corr_data = correlation_inputs(filtered, dataset_type)
     if corr_data.empty or len(corr_data) < 2:
         st.info("Not enough data to compute correlations.")
     else:
@@ -2226,6 +2049,8 @@ with tabs[7]:
         def cached_corr(df):
             return df.corr()
         corr = cached_corr(corr_data)
+        sns = lazy_import("seaborn")
+        plt = lazy_import("matplotlib.pyplot")
         if sns is None or plt is None:
             st.warning("Seaborn or matplotlib is not installed. Please install seaborn and matplotlib to view correlation heatmap.")
         else:
@@ -2255,7 +2080,7 @@ with tabs[8]:
             vacc_df = pd.read_csv(uploaded_file)
             vacc_df['Date'] = pd.to_datetime(vacc_df['Date'], errors='coerce')
             merged = pd.merge(
-                filtered,
+                float_counts(filtered),
                 vacc_df,
                 left_on=['Country', 'Date_reported'],
                 right_on=['Country', 'Date'],
@@ -2277,7 +2102,8 @@ with tabs[8]:
                 return df
             vacc_df = fetch_owid_vacc()
             # Merge on closest date (within 2 days)
-            filtered_copy = filtered.copy()
+            filtered_copy = float_counts(filtered)
+            filtered_copy['Country'] = filtered_copy['Country'].astype(str)
             filtered_copy['Date'] = filtered_copy['Date_reported']
             merged = pd.merge_asof(
                 filtered_copy.sort_values('Date'),
@@ -2379,154 +2205,27 @@ with tabs[9]:
     st.markdown('<div class="card">', unsafe_allow_html=True)
     st.header("📄 Report Export")
     st.markdown("Generate a branded PDF report with summary statistics and charts for your selected filters.<br><span style='opacity:0.7;'>Charts can be optionally included as images.</span>", unsafe_allow_html=True)
-    if canvas is None:
+    if not module_available("reportlab"):
         st.warning("ReportLab is not installed. Please install reportlab to enable PDF export.")
     else:
         # Prepare summary statistics
-        summary = {
-            "Date Range": f"{start_date.strftime('%b %d, %Y')} - {end_date.strftime('%b %d, %Y')}",
-            "Affected Countries": affected_countries,
-            "Total Cases": global_cases,
-            "Total Deaths": global_deaths,
-            "Mortality Rate (%)": f"{avg_mortality:.2f}",
-            "New Cases (Current)": new_cases,
-            "New Deaths (Current)": new_deaths,
-        }
+        summary = report_summary(kpis, start_date, end_date)
         # --- Add cover page info ---
         today_str = datetime.date.today().strftime("%B %d, %Y")
-        # --- Table of Contents ---
-        toc = [
-            ("1. Cover Page", "cover"),
-            ("2. Summary Statistics", "summary"),
-            ("3. Key Charts", "charts"),
-            ("4. Data Table", "datatable")
-        ]
         # --- Prepare charts as images using kaleido ---
         chart_imgs = []
         chart_titles = []
         try:
-            # 1. Global map (static snapshot)
-            fig_map_snapshot = px.scatter_geo(
-                filtered[filtered['Date_reported'] == latest_date],
-                locations="Country",
-                locationmode='country names',
-                color="Cumulative_cases",
-                size="Cumulative_cases",
-                hover_name="Country",
-                projection="natural earth",
-                title='Global COVID-19 Cases Snapshot',
-                color_continuous_scale="Viridis"
-            )
-            with tempfile.NamedTemporaryFile(suffix=".png", delete=False) as tmpfile:
-                fig_map_snapshot.write_image(tmpfile.name, format="png", width=900, height=500)
-                chart_imgs.append(tmpfile.name)
-                chart_titles.append("Global COVID-19 Cases Map")
-            # 2. Top countries bar chart
-            fig_top = px.bar(
-                filtered[filtered['Date_reported'] == latest_date].sort_values("Cumulative_cases", ascending=False).head(10),
-                x="Country", y="Cumulative_cases", color="Cumulative_cases",
-                title="Top 10 Countries by Cases",
-                color_continuous_scale="Blues"
-            )
-            with tempfile.NamedTemporaryFile(suffix=".png", delete=False) as tmpfile:
-                fig_top.write_image(tmpfile.name, format="png", width=900, height=500)
-                chart_imgs.append(tmpfile.name)
-                chart_titles.append("Top 10 Countries by Cases")
-            # 3. Trends chart
-            timeline = filtered.groupby('Date_reported').agg({'Cumulative_cases': 'sum', 'Cumulative_deaths': 'sum'}).reset_index()
-            fig_trend = go.Figure()
-            fig_trend.add_trace(go.Scatter(x=timeline['Date_reported'], y=timeline['Cumulative_cases'], name="Cases", line=dict(color="#3b82f6")))
-            fig_trend.add_trace(go.Scatter(x=timeline['Date_reported'], y=timeline['Cumulative_deaths'], name="Deaths", line=dict(color="#ef4444")))
-            fig_trend.update_layout(title="Cumulative Cases & Deaths Over Time", xaxis_title="Date", yaxis_title="Count")
-            with tempfile.NamedTemporaryFile(suffix=".png", delete=False) as tmpfile:
-                fig_trend.write_image(tmpfile.name, format="png", width=900, height=500)
-                chart_imgs.append(tmpfile.name)
-                chart_titles.append("Cumulative Cases & Deaths Over Time")
+            for img_path, title in chart_images(filtered, latest_date, rollup=rollup, snapshot=snapshot):
+                chart_imgs.append(img_path)
+                chart_titles.append(title)
         except Exception as e:
             st.warning(f"Could not export all charts as images: {e}")
-        # --- PDF Generation ---
-        def generate_pdf(summary, chart_imgs, chart_titles, toc, datatable_df):
-            buffer = BytesIO()
-            c = canvas.Canvas(buffer, pagesize=letter)
-            width, height = letter
-            # --- Cover Page ---
-            c.setFont("Helvetica-Bold", 24)
-            c.drawCentredString(width/2, height-100, "COVID-19 Global Impact Analysis")
-            c.setFont("Helvetica", 16)
-            c.drawCentredString(width/2, height-140, "Manjot Singh")
-            c.setFont("Helvetica", 12)
-            c.drawCentredString(width/2, height-180, f"Date: {today_str}")
-            c.showPage()
-            # --- Table of Contents ---
-            c.setFont("Helvetica-Bold", 18)
-            c.drawString(72, height-100, "Table of Contents")
-            c.setFont("Helvetica", 12)
-            y = height-130
-            for idx, (title, _) in enumerate(toc):
-                c.drawString(90, y, f"{title}")
-                y -= 22
-            c.showPage()
-            # --- Summary Statistics ---
-            c.setFont("Helvetica-Bold", 18)
-            c.drawString(72, height-100, "Summary Statistics")
-            c.setFont("Helvetica", 12)
-            y = height-130
-            for k, v in summary.items():
-                c.drawString(90, y, f"{k}: {v}")
-                y -= 20
-            c.showPage()
-            # --- Charts ---
-            c.setFont("Helvetica-Bold", 18)
-            c.drawString(72, height-100, "Key Charts")
-            c.setFont("Helvetica", 12)
-            y = height-120
-            for img_path, title in zip(chart_imgs, chart_titles):
-                try:
-                    img = Image.open(img_path)
-                    aspect = img.width / img.height
-                    img_width = width - 120
-                    img_height = img_width / aspect
-                    if img_height > (height-220):
-                        img_height = height-220
-                        img_width = img_height * aspect
-                    c.drawString(90, y, title)
-                    y -= 20
-                    c.drawImage(img_path, 60, y-img_height, width=img_width, height=img_height)
-                    y -= img_height + 30
-                    if y < 120:
-                        c.showPage()
-                        y = height-120
-                except Exception:
-                    continue
-            c.showPage()
-            # --- Data Table (first 20 rows) ---
-            c.setFont("Helvetica-Bold", 18)
-            c.drawString(72, height-100, "Data Table (First 20 Rows)")
-            c.setFont("Helvetica", 8)
-            y = height-120
-            data_cols = datatable_df.columns.tolist()
-            col_width = (width-100)//len(data_cols)
-            # Header
-            for i, col in enumerate(data_cols):
-                c.drawString(72 + i*col_width, y, str(col)[:15])
-            y -= 12
-            # Rows
-            for idx, row in datatable_df.head(20).iterrows():
-                for i, col in enumerate(data_cols):
-                    c.drawString(72 + i*col_width, y, str(row[col])[:15])
-                y -= 12
-                if y < 60:
-                    c.showPage()
-                    y = height-120
-            c.save()
-            pdf = buffer.getvalue()
-            buffer.close()
-            return pdf
         # --- PDF Download Button ---
         if st.button("Generate & Download PDF Report"):
             with st.spinner("Generating PDF report..."):
-                datatable_df = filtered[filtered['Date_reported'] == latest_date].sort_values('Country').reset_index(drop=True)
-                pdf_bytes = generate_pdf(summary, chart_imgs, chart_titles, toc, datatable_df)
+                datatable_df = latest_rows.reset_index(drop=True)
+                pdf_bytes = generate_pdf(summary, chart_imgs, chart_titles, REPORT_TOC, datatable_df, today_str)
                 st.download_button(
                     "📄 Download PDF Report",
                     data=pdf_bytes,
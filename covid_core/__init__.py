@@ -0,0 +1,40 @@
+"""
+Headless engine behind the COVID-19 dashboard: dataset build and store, filtering, KPIs,
+tab aggregations, forecasting and reports. Nothing here imports Streamlit.
+"""
+from .animated_map import (
+    MAP_CACHE_MAX_BYTES, MAP_DEFAULT_BUDGET, MAP_MIN_SHARE, MAP_PAYLOAD_BUDGETS, budget_frame_dates, build_animated_map,
+    estimated_map_bytes, map_color_scale, map_figure_key, map_metrics, map_theme, plan_map_frames
+)
+from .cube import build_rollup_cube, cube_nbytes, range_latest, range_peaks, range_sums, slice_cube
+from .deltas import compute_deltas, corrections_summary, group_boundaries
+from .display import (
+    COLUMN_FORMATS, COLUMN_LABELS, PERCENT_COLUMNS, column_formats, format_counts, format_percent, formatted_table
+)
+from .export import (
+    COMPRESSIONS, EXCEL_MAX_DATA_ROWS, EXPORT_FORMATS, STREAMED_FORMATS, available_compressions, build_export,
+    columnar_bytes, excel_benchmark, excel_bytes, export_file_name, export_mime, iter_export, prune_export_files,
+    write_export
+)
+from .filter_cache import FILTER_CACHE_MAX_BYTES, FilterCache, filter_key
+from .filter_index import build_filter_index, filter_benchmark, filter_positions, synthetic_dataset
+from .forecast import FORECAST_PERIODS, arima_forecast, arima_ready, fit_forecast, forecast_history, prophet_forecast
+from .forecast_pool import (
+    FORECAST_MAX_COUNTRIES, FORECAST_TIMEOUT_SECONDS, forecast_executor, forecast_time_limited, forecast_workers,
+    iter_forecasts, stop_forecast_executor
+)
+from .geo import ISO2_TO_ISO3, iso3_codes
+from .ingest import build_dataset, derive_metrics, incremental_build, prepare_rows, stream_build_dataset
+from .lazy import DEFERRED_MODULES, STARTUP_MODULES, import_time_report, lazy_import, module_available
+from .lru import ByteLRUCache
+from .paging import TABLE_PAGE_SIZES, table_page, table_positions
+from .queries import (
+    correlation_inputs, country_summary, filter_data, kpi_snapshot, new_count_columns, radar_matrix,
+    region_date_summary, regional_summary, regional_timeline, regional_trends, top_countries, trend_timeline
+)
+from .report import REPORT_TOC, chart_images, generate_pdf, quick_report_pdf, report_summary
+from .rolling import ROLLING_STATS, TREND_WINDOWS_DAYS, add_rolling_columns, rolling_column, rolling_stats, window_rows
+from .rollup import WEEKLY_VIEW_COLUMNS, weekly_rollup, weekly_view
+from .schema import CATEGORY_COLUMNS, COUNT_COLUMNS, apply_compact_schema, float_counts, format_bytes
+from .snapshot import as_of_positions, as_of_rows, build_snapshot_index
+from .store import DATASET_FILES, PIPELINE_VERSION, PROCESSED_STORE_DIR, load_dataset
@@ -0,0 +1,243 @@
+"""
+Animated bubble map of the filtered view, built one sampled frame at a time.
+"""
+import time
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+
+# Serialized-size budgets of the map figure a client is sent; frames (and, for "Light", minor countries)
+# are sampled down to fit
+MAP_PAYLOAD_BUDGETS = {"Light": 256 * 1024, "Standard": 1024 * 1024, "Full": 4 * 1024 * 1024}
+MAP_DEFAULT_BUDGET = "Standard"
+# Approximate JSON cost of one marker and of one frame's own trace, name and slider step
+MAP_BYTES_PER_MARKER = 52
+MAP_BYTES_PER_FRAME = 600
+# Fewer frames than this fit the budget: countries whose peak is under MAP_MIN_SHARE of the view's are dropped
+MAP_MIN_FRAMES = 12
+MAP_MIN_SHARE = 0.001
+# Budget of the shared map figure cache, counted as the figures' serialized (JSON) size
+MAP_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+def map_metrics(view_options, dataset_type):
+    """
+    (case column, death column, title) the map shows for a view
+    """
+    if view_options == "Cumulative":
+        return "Cumulative_cases", "Cumulative_deaths", "Cumulative Cases"
+    if view_options == "Daily New" and dataset_type == "Daily":
+        return "New_daily_cases", "New_daily_deaths", "New Daily Cases"
+    return "New_weekly_cases", "New_weekly_deaths", "New Weekly Cases"
+
+def map_color_scale(title_metric):
+    # Pastel scales: blue for cumulative cases, purple for daily and orange for weekly new cases
+    if title_metric == "Cumulative Cases":
+        return ["#eaf1ff", "#b4d8fe", "#6ea8fe"]
+    if "New Daily" in title_metric:
+        return ["#ffe1fa", "#eabfff", "#b39ddb", "#ffd6f9", "#f6eaff"]
+    return ["#fff6e8", "#ffe1b4", "#ffb86c", "#ffd6f9", "#eabfff"]
+
+def map_theme(map_style, is_dark_theme=False):
+    """
+    Background, land, ocean and text colours plus the Plotly template for a map style
+    """
+    if map_style == "dark" or (map_style == "auto" and is_dark_theme):
+        return {"bgcolor": "rgba(30,30,40,0.95)", "landcolor": "#252c36", "oceancolor": "#121418", "textcolor": "white", "template": "plotly_dark"}
+    if map_style == "light" or (map_style == "auto" and not is_dark_theme):
+        return {"bgcolor": "rgba(240,242,246,0.95)", "landcolor": "#ebedf0", "oceancolor": "#f7f8fa", "textcolor": "black", "template": "plotly_white"}
+    # satellite
+    return {"bgcolor": "rgba(30,30,40,0.95)", "landcolor": "#3b3b3b", "oceancolor": "#111111", "textcolor": "white", "template": "plotly_dark"}
+
+def estimated_map_bytes(frames, markers):
+    return MAP_BYTES_PER_FRAME * frames + MAP_BYTES_PER_MARKER * markers
+
+def budget_frame_dates(date_markers, keep, budget_bytes):
+    """
+    Positions of the most evenly spaced dates whose estimated payload fits budget_bytes, given the markers
+    of each sorted date. The positions in keep are always included, even over budget.
+    """
+    n_dates = len(date_markers)
+    keep = np.unique(np.asarray(keep, dtype=np.int64))
+    best = keep
+    # Binary search on the number of evenly spaced dates; the cost grows with it
+    low, high = 1, n_dates
+    while low <= high:
+        count = (low + high) // 2
+        picks = np.union1d(np.linspace(0, n_dates - 1, count).round().astype(np.int64), keep)
+        if estimated_map_bytes(len(picks), date_markers[picks].sum()) <= budget_bytes:
+            best, low = picks, count + 1
+        else:
+            high = count - 1
+    return best
+
+def plan_map_frames(map_data, map_metric, budget_bytes, min_share=None):
+    """
+    Dates to animate so the map fits budget_bytes: as many evenly spaced dates as fit, always with the last
+    date and the date the metric peaks over the view. With min_share, if fewer than MAP_MIN_FRAMES fit,
+    countries whose peak is below min_share of the view's peak are dropped first.
+    Returns (map_data without dropped countries, sampled dates, number of dropped countries).
+    """
+    dropped = 0
+    for thin in (False, True):
+        if thin:
+            country_peaks = map_data.groupby('Country', sort=False)[map_metric].transform('max')
+            significant = (country_peaks >= min_share * country_peaks.max()).to_numpy()
+            dropped = map_data.loc[~significant, 'Country'].nunique()
+            map_data = map_data[significant]
+        dates, date_codes = np.unique(map_data['Date_reported'].to_numpy(), return_inverse=True)
+        if len(dates) == 0:
+            return map_data, dates, dropped
+        date_markers = np.bincount(date_codes, minlength=len(dates))
+        date_totals = np.bincount(date_codes, weights=map_data[map_metric].fillna(0).to_numpy(), minlength=len(dates))
+        picks = budget_frame_dates(date_markers, [len(dates) - 1, int(np.argmax(date_totals))], budget_bytes)
+        if thin or not min_share or len(picks) >= min(MAP_MIN_FRAMES, len(dates)):
+            return map_data, dates[picks], dropped
+
+def _frame_trace(frame, map_metric, map_deaths, sizeref):
+    return go.Scattergeo(
+        locations=frame['Location'],
+        hovertext=frame['Country'],
+        customdata=frame[[map_deaths, 'Mortality_rate']].to_numpy(),
+        hovertemplate=(
+            f"<b>%{{hovertext}}</b><br><br>{map_metric}=%{{marker.color}}<br>"
+            f"{map_deaths}=%{{customdata[0]}}<br>Mortality_rate=%{{customdata[1]}}<extra></extra>"
+        ),
+        marker=dict(
+            size=frame['size'].to_numpy(), sizemode='area', sizeref=sizeref,
+            color=frame[map_metric].to_numpy(), coloraxis='coloraxis'
+        ),
+        showlegend=False
+    )
+
+def map_figure_key(view_key, view_options, map_style, animation_speed, is_dark_theme=False,
+                   budget_bytes=MAP_PAYLOAD_BUDGETS[MAP_DEFAULT_BUDGET], min_share=None):
+    """
+    Cache key of an animated map: the filtered view's key (dataset, source file and filter) plus
+    everything else the figure depends on. "auto" style resolves through the theme, so that is keyed too.
+    """
+    return (view_key, view_options, map_style, int(animation_speed), map_style == "auto" and bool(is_dark_theme),
+            budget_bytes, min_share)
+
+def build_animated_map(filtered, view_options, dataset_type, map_style, animation_speed, is_dark_theme=False,
+                       budget_bytes=MAP_PAYLOAD_BUDGETS[MAP_DEFAULT_BUDGET], min_share=None):
+    """
+    Animated scatter_geo of the filtered view over the dates plan_map_frames() fits into budget_bytes.
+    Rows are grouped by date once and the colour range computed once; only the sampled frames are built.
+    Returns (figure, build_info) where build_info holds build_seconds, frames, markers, dropped countries,
+    countries without a map location and the figure's JSON size in bytes.
+    """
+    started = time.perf_counter()
+    map_metric, map_deaths, title_metric = map_metrics(view_options, dataset_type)
+
+    # Placed by the ISO-3 Location resolved at load; rows without one (see geo.iso3_codes) cannot be drawn
+    located = filtered['Location'].notna().to_numpy()
+    unlocated = filtered.loc[~located, 'Country'].nunique()
+    map_data = filtered.loc[located, ['Country', 'Location', 'Date_reported', map_metric, map_deaths, 'Mortality_rate']]
+    map_data = map_data.astype({map_metric: 'float64', map_deaths: 'float64', 'Mortality_rate': 'float64'})
+    map_data['Country'] = map_data['Country'].astype(str)
+    map_data['Location'] = map_data['Location'].astype(str)
+    # Rounded to what the hover label and bubble radius can show, which keeps the frames' JSON short
+    map_data['Mortality_rate'] = map_data['Mortality_rate'].round(2)
+    # Make bubble sizes more visually appealing; a missing count gets no bubble
+    map_data['size'] = map_data[map_metric].clip(lower=1).pow(0.3).round(2).fillna(0)
+    # 95th percentile of the whole view for better contrast, shared by every frame
+    color_max = map_data[map_metric].quantile(0.95)
+    # Bubble areas scaled as plotly express does (largest bubble 20px across)
+    sizeref = 2.0 * map_data['size'].max() / (20 ** 2) if map_data['size'].notna().any() else 1
+
+    map_data, sampled_dates, dropped = plan_map_frames(map_data, map_metric, budget_bytes, min_share)
+    # One stable sort by date; each sampled frame is then a contiguous slice
+    map_data = map_data[map_data['Date_reported'].isin(sampled_dates)].sort_values('Date_reported', kind='stable')
+    frame_dates = map_data['Date_reported'].to_numpy()
+    bounds = np.r_[np.searchsorted(frame_dates, np.array(sampled_dates, dtype=frame_dates.dtype)), len(map_data)]
+    labels = [pd.Timestamp(date).strftime('%m/%d/%Y') for date in sampled_dates]
+
+    frames = [
+        go.Frame(data=[_frame_trace(map_data.iloc[bounds[i]:bounds[i + 1]], map_metric, map_deaths, sizeref)], name=label)
+        for i, label in enumerate(labels)
+    ]
+    theme = map_theme(map_style, is_dark_theme)
+    fig = go.Figure(
+        data=frames[0].data if frames else [],
+        frames=frames,
+        layout=go.Layout(
+            title=f'COVID-19: {title_metric} Over Time',
+            coloraxis=dict(
+                colorscale=map_color_scale(title_metric), cmin=0, cmax=color_max,
+                colorbar=dict(title=map_metric)
+            ),
+            template=theme["template"],
+            paper_bgcolor=theme["bgcolor"],
+            geo=dict(
+                showland=True,
+                landcolor=theme["landcolor"],
+                showocean=True,
+                oceancolor=theme["oceancolor"],
+                showcountries=True,
+                countrycolor="#666666",
+                showcoastlines=False,
+                projection_type="natural earth",
+                showframe=False
+            ),
+            height=620,
+            updatemenus=[{
+                "buttons": [
+                    {
+                        "args": [None, {"frame": {"duration": animation_speed, "redraw": True}, "fromcurrent": True}],
+                        "label": "▶",
+                        "method": "animate"
+                    },
+                    {
+                        "args": [[None], {"frame": {"duration": 0, "redraw": False}, "mode": "immediate"}],
+                        "label": "■",
+                        "method": "animate"
+                    }
+                ],
+                "direction": "left",
+                "pad": {"r": 10, "t": 10},
+                "showactive": False,
+                "type": "buttons",
+                "x": 0.1,
+                "y": 0,
+                "bgcolor": "rgba(100,100,100,0.5)",
+                "font": {"color": theme["textcolor"]}
+            }],
+            sliders=[{
+                "active": 0,
+                "yanchor": "top",
+                "xanchor": "left",
+                "currentvalue": {
+                    "font": {"size": 16, "color": theme["textcolor"]},
+                    "prefix": "Date: ",
+                    "visible": True,
+                    "xanchor": "right"
+                },
+                "transition": {"duration": animation_speed},
+                "pad": {"b": 10, "t": 50},
+                "len": 0.9,
+                "x": 0.1,
+                "y": 0,
+                "steps": [
+                    {
+                        "args": [
+                            [label],
+                            {"frame": {"duration": animation_speed, "redraw": True}, "mode": "immediate"}
+                        ],
+                        "label": label,
+                        "method": "animate"
+                    } for label in labels
+                ]
+            }]
+        )
+    )
+    build_seconds = time.perf_counter() - started
+    return fig, {
+        "build_seconds": build_seconds,
+        "frames": len(frames),
+        "markers": len(map_data),
+        "dropped_countries": dropped,
+        "unlocated_countries": unlocated,
+        "json_bytes": len(fig.to_json()),
+    }
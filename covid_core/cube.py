@@ -0,0 +1,131 @@
+"""
+Materialized rollup cube of a processed frame, built once per dataset.
+Filtered views are answered by slicing it instead of regrouping the raw rows on every rerun.
+"""
+import numpy as np
+import pandas as pd
+
+from .deltas import group_boundaries
+
+SUM_COLUMNS = ['Cumulative_cases', 'Cumulative_deaths', 'New_weekly_cases', 'New_weekly_deaths', 'New_daily_cases', 'New_daily_deaths']
+NEW_COUNT_COLUMNS = ['New_weekly_cases', 'New_weekly_deaths', 'New_daily_cases', 'New_daily_deaths']
+PEAK_COLUMNS = ['Cumulative_cases', 'Cumulative_deaths', 'Mortality_rate']
+
+def build_rollup_cube(df):
+    """
+    Precompute the aggregates behind the dashboard for a processed frame sorted by country then date:
+    - date_region: per (date, WHO region) sums of the count columns and the number of countries reporting
+    - date x country: each country's row range with a (country, day) search key, prefix sums of the new
+      counts and the position of the last non-missing value per column, so per-country totals, peaks and
+      latest values for any date range come from positions rather than a groupby
+    """
+    date_region = df.groupby(['Date_reported', 'WHO_region'], observed=True).agg(
+        Countries=('Country', 'nunique'),
+        **{col: (col, 'sum') for col in SUM_COLUMNS}
+    ).reset_index()
+    date_region[SUM_COLUMNS] = date_region[SUM_COLUMNS].astype('Int64')
+
+    country_starts = group_boundaries(df['Country'])
+    country_sizes = np.diff(np.r_[country_starts, len(df)])
+    days = df['Date_reported'].to_numpy().astype('datetime64[D]').astype(np.int64)
+    day_origin = int(days.min()) if len(days) else 0
+    day_span = int(days.max()) - day_origin + 2 if len(days) else 1
+    keys = np.repeat(np.arange(len(country_starts), dtype=np.int64), country_sizes) * day_span + (days - day_origin)
+
+    values = {
+        col: df[col].to_numpy(dtype='float64', na_value=np.nan)
+        for col in dict.fromkeys(SUM_COLUMNS + PEAK_COLUMNS)
+    }
+    positions = np.arange(len(df))
+    last_valid = {}
+    for col, column_values in values.items():
+        missing = np.isnan(column_values)
+        if missing.any():
+            last_valid[col] = np.maximum.accumulate(np.where(missing, -1, positions))
+    prefix_sums = {col: np.r_[0.0, np.nancumsum(values[col])] for col in NEW_COUNT_COLUMNS}
+
+    return {
+        "date_region": date_region,
+        "countries": df['Country'].iloc[country_starts].reset_index(drop=True),
+        "country_codes": df['Country_code'].iloc[country_starts].reset_index(drop=True),
+        "country_regions": df['WHO_region'].iloc[country_starts].reset_index(drop=True),
+        "keys": keys,
+        "day_origin": day_origin,
+        "day_span": day_span,
+        "dates": df['Date_reported'].to_numpy(),
+        "values": values,
+        "last_valid": last_valid,
+        "prefix_sums": prefix_sums,
+    }
+
+def cube_nbytes(cube):
+    """
+    Approximate memory held by a cube in bytes
+    """
+    arrays = [cube["keys"], cube["dates"], *cube["values"].values(), *cube["last_valid"].values(), *cube["prefix_sums"].values()]
+    return int(sum(a.nbytes for a in arrays) + cube["date_region"].memory_usage(deep=True).sum())
+
+def _day(date, cube):
+    return int(np.datetime64(pd.Timestamp(date), 'D').astype(np.int64)) - cube["day_origin"]
+
+def slice_cube(cube, start_date, end_date, regions=None, countries=None):
+    """
+    The cube's view of a sidebar filter (dates inclusive, optional WHO regions), or None for a
+    country filter, which the date x region aggregates cannot answer.
+    """
+    if countries:
+        return None
+    date_region = cube["date_region"]
+    in_view = (date_region['Date_reported'] >= pd.Timestamp(start_date)) & (date_region['Date_reported'] <= pd.Timestamp(end_date))
+    if regions:
+        in_view &= date_region['WHO_region'].isin(regions)
+
+    # Each country's rows within the date range, found by binary search on the (country, day) key
+    group_offsets = np.arange(len(cube["countries"]), dtype=np.int64) * cube["day_span"]
+    # Days are clipped to the key span so a search never runs into a neighbouring country's keys
+    start_day = min(max(_day(start_date, cube), 0), cube["day_span"] - 1)
+    end_day = min(max(_day(end_date, cube), -1), cube["day_span"] - 1)
+    starts = np.searchsorted(cube["keys"], group_offsets + start_day, side='left')
+    ends = np.searchsorted(cube["keys"], group_offsets + end_day, side='right')
+    selected = ends > starts
+    if regions:
+        selected &= cube["country_regions"].isin(regions).to_numpy()
+    selected = np.flatnonzero(selected)
+    return {
+        "cube": cube,
+        "date_region": date_region[in_view],
+        "country_index": selected,
+        "starts": starts[selected],
+        "ends": ends[selected],
+    }
+
+def range_sums(rollup, col):
+    """
+    Per selected country, the sum of col over the date range (missing values count as 0)
+    """
+    prefix = rollup["cube"]["prefix_sums"][col]
+    return prefix[rollup["ends"]] - prefix[rollup["starts"]]
+
+def range_peaks(rollup, col):
+    """
+    Per selected country, the largest non-missing value of col over the date range (NaN if none)
+    """
+    values = rollup["cube"]["values"][col]
+    if len(rollup["starts"]) == 0:
+        return values[:0]
+    # reduceat over [start, end) pairs; the appended NaN keeps an end at the last row a valid index
+    bounds = np.column_stack([rollup["starts"], rollup["ends"]]).ravel()
+    return np.fmax.reduceat(np.r_[values, np.nan], bounds)[::2]
+
+def range_latest(rollup, col):
+    """
+    Per selected country, the last non-missing value of col within the date range (NaN if none),
+    as groupby().last() gives on the filtered rows
+    """
+    cube = rollup["cube"]
+    last_row = rollup["ends"] - 1
+    if col not in cube["last_valid"]:
+        return cube["values"][col][last_row]
+    position = cube["last_valid"][col][last_row]
+    latest = cube["values"][col][np.maximum(position, 0)]
+    return np.where(position >= rollup["starts"], latest, np.nan)
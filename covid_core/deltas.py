@@ -0,0 +1,54 @@
+"""
+Vectorized per-country first differences of cumulative counts.
+"""
+import numpy as np
+import pandas as pd
+
+def group_boundaries(groups):
+    """
+    Start positions of each run of equal keys in an already grouped (sorted) Series.
+    Compares neighbours directly (category codes when available) instead of hashing every key.
+    """
+    if isinstance(groups.dtype, pd.CategoricalDtype):
+        keys = groups.cat.codes.to_numpy()
+    else:
+        keys = groups.to_numpy()
+    return np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+
+def compute_deltas(df, value_columns, group_column='Country', clip=True, previous=None):
+    """
+    Per-group first differences of cumulative columns for a frame sorted by group then date.
+    All columns are differenced in a single np.diff pass and masked at group boundaries, so the
+    first row of each group is 0 (as groupby().diff().fillna(0) gave), or its difference from the
+    group's row in `previous` (last known values indexed by group) when the frame continues earlier data.
+    Negative deltas are downward reporting corrections: they are counted per group and, with
+    clip=True, clipped to 0.
+    Returns (deltas, corrections): an (n, k) float64 array and a per-group count frame.
+    """
+    values = df[value_columns].to_numpy(dtype='float64', na_value=np.nan)
+    deltas = np.zeros_like(values)
+    if len(values) == 0:
+        return deltas, pd.DataFrame(columns=value_columns, dtype='int64')
+    np.subtract(values[1:], values[:-1], out=deltas[1:])
+    group_starts = group_boundaries(df[group_column])
+    if previous is not None:
+        seeds = previous.reindex(df[group_column].iloc[group_starts].to_numpy())[value_columns]
+        deltas[group_starts] = values[group_starts] - seeds.to_numpy(dtype='float64', na_value=np.nan)
+    else:
+        deltas[group_starts] = 0
+    np.nan_to_num(deltas, copy=False, nan=0.0)
+    corrections = pd.DataFrame(
+        np.add.reduceat(deltas < 0, group_starts, axis=0, dtype=np.int64),
+        index=pd.Index(df[group_column].iloc[group_starts].to_numpy(), name=group_column),
+        columns=value_columns
+    )
+    if clip:
+        np.maximum(deltas, 0, out=deltas)
+    return deltas, corrections
+
+def corrections_summary(corrections):
+    """
+    JSON-friendly {group: {column: count}} for groups with at least one negative correction
+    """
+    flagged = corrections[corrections.sum(axis=1) > 0]
+    return {str(group): {col: int(n) for col, n in row.items()} for group, row in flagged.iterrows()}
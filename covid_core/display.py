@@ -0,0 +1,88 @@
+"""
+Display formatting of table columns. Tables shown in the app stay numeric and hand their formats to
+the grid, which applies them client-side; output that needs text is formatted a whole column at a time.
+"""
+import numpy as np
+import pandas as pd
+
+from .schema import COUNT_COLUMNS
+
+# Display names of the processed and summary columns
+COLUMN_LABELS = {
+    'Date_reported': 'Date',
+    'Country_code': 'Country Code',
+    'Location': 'ISO-3 Code',
+    'WHO_region': 'WHO Region',
+    'Countries': 'Countries Affected',
+    'Cumulative_cases': 'Total Cases',
+    'Cumulative_deaths': 'Total Deaths',
+    'New_daily_cases': 'Daily New Cases',
+    'New_daily_deaths': 'Daily New Deaths',
+    'New_weekly_cases': 'Weekly New Cases',
+    'New_weekly_deaths': 'Weekly New Deaths',
+    'Mortality_rate': 'Mortality Rate',
+}
+# printf-style grid formats. Counts need none: the grid groups thousands by default, which would also
+# turn the integer period codes (Month is YYYYMM) into "202,001", so those are printed as plain integers.
+COLUMN_FORMATS = {
+    'Mortality_rate': "%.2f%%",
+    'Year': "%d",
+    'Month': "%d",
+    'Week': "%d",
+    'week_id': "%d",
+}
+PERCENT_COLUMNS = ['Mortality_rate']
+
+def column_formats(columns, labels=None):
+    """
+    {column: {"label": ..., "format": ...}} for the columns that have a display label (from labels)
+    or a grid format; the app turns each into a number column config
+    """
+    specs = {}
+    for col in columns:
+        spec = {}
+        if labels and col in labels:
+            spec["label"] = labels[col]
+        if col in COLUMN_FORMATS:
+            spec["format"] = COLUMN_FORMATS[col]
+        if spec:
+            specs[col] = spec
+    return specs
+
+def _column_text(values, template):
+    # One bound str.format mapped over the whole column's Python numbers; missing values become ""
+    values = pd.Series(values, copy=False)
+    missing = values.isna().to_numpy()
+    numbers = values.to_numpy(dtype='float64', na_value=np.nan)
+    text = list(map(template.format, np.where(missing, 0, numbers).tolist()))
+    return pd.Series(text, index=values.index, dtype=object).mask(missing, "")
+
+def format_counts(values):
+    """
+    "1,234,567" strings of a column of counts (rounded to integers), "" where missing
+    """
+    return _column_text(values, "{:,.0f}")
+
+def format_percent(values, decimals=2):
+    """
+    "12.34%" strings of a column of percentages, "" where missing
+    """
+    return _column_text(values, f"{{:.{decimals}f}}%")
+
+def formatted_table(frame):
+    """
+    Copy of frame as display strings, for output that cannot format numbers itself (the PDF report):
+    counts with thousands separators, percentages to two decimals and dates as YYYY-MM-DD
+    """
+    formatted = pd.DataFrame(index=frame.index)
+    for col in frame.columns:
+        values = frame[col]
+        if col in COUNT_COLUMNS or col == 'Countries':
+            formatted[col] = format_counts(values)
+        elif col in PERCENT_COLUMNS:
+            formatted[col] = format_percent(values)
+        elif values.dtype.kind == 'M':
+            formatted[col] = values.dt.strftime('%Y-%m-%d').fillna("")
+        else:
+            formatted[col] = values.astype(str).mask(values.isna(), "")
+    return formatted
@@ -0,0 +1,231 @@
+"""
+Download artifacts of a filtered view, built one format at a time when requested.
+"""
+import os
+import shutil
+import time
+import zlib
+from io import BytesIO
+
+from .lazy import lazy_import, module_available
+from .report import quick_report_pdf
+
+# Sidebar label, download file name and MIME type per export format
+EXPORT_FORMATS = {
+    "CSV": {"label": "📥 CSV", "file_name": "covid_full_analysis.csv", "mime": "text/csv"},
+    "Excel": {
+        "label": "📊 Excel", "file_name": "covid_full_analysis.xlsx",
+        "mime": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    },
+    "JSON": {"label": "🔄 JSON", "file_name": "covid_full_analysis.json", "mime": "application/json"},
+    "NDJSON": {"label": "🧾 NDJSON", "file_name": "covid_full_analysis.ndjson", "mime": "application/x-ndjson"},
+    "Parquet": {"label": "🧱 Parquet", "file_name": "covid_full_analysis.parquet", "mime": "application/vnd.apache.parquet"},
+    "Feather": {"label": "🪶 Feather", "file_name": "covid_full_analysis.feather", "mime": "application/vnd.apache.arrow.file"},
+    "PDF": {"label": "📄 PDF Report", "file_name": "covid_full_analysis_report.pdf", "mime": "application/pdf"},
+}
+
+# Columnar formats keep the loaded dtypes (dates, categoricals, nullable counts) and compress per column
+COLUMNAR_COMPRESSION = "zstd"
+
+# Text formats are encoded in row batches so only one batch is held as text at a time
+STREAMED_FORMATS = ("CSV", "JSON", "NDJSON")
+STREAM_BATCH_ROWS = 10_000
+# File suffix and MIME type per compression of the streamed formats; zstd needs the optional zstandard package
+COMPRESSIONS = {
+    "gzip": {"suffix": ".gz", "mime": "application/gzip"},
+    "zstd": {"suffix": ".zst", "mime": "application/zstd"},
+}
+
+def available_compressions():
+    """
+    Compressions usable here, besides None
+    """
+    return [name for name in COMPRESSIONS if name != "zstd" or module_available("zstandard")]
+
+def _encoded_batches(filtered, export_format, batch_rows):
+    # Batches are joined so the result matches a single to_csv()/to_json() of the whole view
+    for batch_start in range(0, max(len(filtered), 1), batch_rows):
+        batch = filtered.iloc[batch_start:batch_start + batch_rows]
+        first = batch_start == 0
+        last = batch_start + batch_rows >= len(filtered)
+        if export_format == "CSV":
+            text = batch.to_csv(index=False, header=first)
+        elif export_format == "NDJSON":
+            text = batch.to_json(orient='records', lines=True)
+        else:
+            records = batch.to_json(orient='records')[1:-1]
+            text = ("[" if first else ",") + records + ("]" if last else "")
+        yield text.encode("utf-8")
+
+def _compressor(compression):
+    if compression == "gzip":
+        return zlib.compressobj(wbits=31)  # gzip container
+    if compression == "zstd":
+        zstandard = lazy_import("zstandard")
+        if zstandard is None:
+            raise ValueError("zstd compression needs the zstandard package")
+        return zstandard.ZstdCompressor().compressobj()
+    raise ValueError(f"Unknown compression: {compression}")
+
+def iter_export(filtered, export_format, compression=None, batch_rows=STREAM_BATCH_ROWS):
+    """
+    Encode the filtered view as CSV, JSON or NDJSON in row batches, yielding bytes chunks, optionally
+    gzip or zstd compressed. Peak memory is one batch plus the compressor state, whatever the view size.
+    """
+    if export_format not in STREAMED_FORMATS:
+        raise ValueError(f"{export_format} cannot be streamed")
+    chunks = _encoded_batches(filtered, export_format, batch_rows)
+    if compression is None:
+        yield from chunks
+        return
+    compressor = _compressor(compression)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+def write_export(filtered, export_format, path, compression=None, batch_rows=STREAM_BATCH_ROWS, max_bytes=None):
+    """
+    Stream iter_export() into the file at path, so neither the encoded nor the compressed view is ever held
+    whole. Returns (bytes written, build_seconds), or (None, build_seconds) once the file would grow past
+    max_bytes. The file is removed when it is over the limit or the write fails.
+    """
+    started = time.perf_counter()
+    written = 0
+    try:
+        with open(path, "wb") as f:
+            for chunk in iter_export(filtered, export_format, compression, batch_rows):
+                written += len(chunk)
+                if max_bytes is not None and written > max_bytes:
+                    break
+                f.write(chunk)
+    except BaseException:
+        _remove_file(path)
+        raise
+    if max_bytes is not None and written > max_bytes:
+        _remove_file(path)
+        return None, time.perf_counter() - started
+    return written, time.perf_counter() - started
+
+def _remove_file(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+def prune_export_files(directory, max_age_seconds):
+    """
+    Remove the entries of directory last modified more than max_age_seconds ago
+    """
+    if not os.path.isdir(directory):
+        return
+    cutoff = time.time() - max_age_seconds
+    for entry in os.scandir(directory):
+        try:
+            if entry.stat().st_mtime < cutoff:
+                shutil.rmtree(entry.path) if entry.is_dir() else os.remove(entry.path)
+        except OSError:
+            # Already removed by another session
+            pass
+
+def export_file_name(export_format, compression=None):
+    return EXPORT_FORMATS[export_format]["file_name"] + (COMPRESSIONS[compression]["suffix"] if compression else "")
+
+def export_mime(export_format, compression=None):
+    return COMPRESSIONS[compression]["mime"] if compression else EXPORT_FORMATS[export_format]["mime"]
+
+# Excel's sheet limit is 1,048,576 rows including the header
+EXCEL_MAX_DATA_ROWS = 1_048_575
+
+def _excel_cells(batch):
+    # Column-wise conversion to Python values, with None for missing and datetimes for dates
+    columns = []
+    for col in batch.columns:
+        values = batch[col]
+        if values.dtype.kind == 'M':
+            # Series.dt.to_pydatetime() is deprecated in pandas 2.1 (it will return a Series, not an array)
+            cells = [stamp.to_pydatetime() for stamp in values]
+        else:
+            cells = values.astype(object).tolist()
+        if values.hasnans:
+            cells = [None if missing else cell for cell, missing in zip(cells, values.isna().tolist())]
+        columns.append(cells)
+    return zip(*columns)
+
+def _write_excel_sheets(workbook, sheet_name, frame, batch_rows, max_rows):
+    # Views longer than the row limit continue on "<name> (2)", "<name> (3)", ...
+    for part, part_start in enumerate(range(0, max(len(frame), 1), max_rows)):
+        sheet = workbook.create_sheet(sheet_name if part == 0 else f"{sheet_name} ({part + 1})")
+        sheet.append([str(col) for col in frame.columns])
+        part_end = min(part_start + max_rows, len(frame))
+        for batch_start in range(part_start, part_end, batch_rows):
+            for row in _excel_cells(frame.iloc[batch_start:min(batch_start + batch_rows, part_end)]):
+                sheet.append(row)
+
+def excel_bytes(filtered, summaries=None, batch_rows=STREAM_BATCH_ROWS, max_rows=EXCEL_MAX_DATA_ROWS):
+    """
+    Workbook of the filtered view plus one sheet per summary ({sheet name: DataFrame}), written with
+    openpyxl's write-only mode: rows are appended in batches and streamed to the file, not kept as cells
+    """
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    _write_excel_sheets(workbook, "Filtered Data", filtered, batch_rows, max_rows)
+    for sheet_name, summary in (summaries or {}).items():
+        _write_excel_sheets(workbook, sheet_name, summary, batch_rows, max_rows)
+    excel_buffer = BytesIO()
+    workbook.save(excel_buffer)
+    return excel_buffer.getvalue()
+
+def excel_benchmark(filtered, summaries=None):
+    """
+    Time pandas' ExcelWriter (openpyxl, normal mode) against excel_bytes() on the same view
+    """
+    import pandas as pd
+
+    records = []
+    started = time.perf_counter()
+    excel_buffer = BytesIO()
+    with pd.ExcelWriter(excel_buffer, engine='openpyxl') as writer:
+        filtered.to_excel(writer, sheet_name="Filtered Data", index=False)
+        for sheet_name, summary in (summaries or {}).items():
+            summary.to_excel(writer, sheet_name=sheet_name, index=False)
+    records.append({"Writer": "pandas ExcelWriter", "Seconds": time.perf_counter() - started, "Bytes": len(excel_buffer.getvalue())})
+    started = time.perf_counter()
+    data = excel_bytes(filtered, summaries)
+    records.append({"Writer": "openpyxl write-only", "Seconds": time.perf_counter() - started, "Bytes": len(data)})
+    return pd.DataFrame(records)
+
+def columnar_bytes(filtered, export_format):
+    """
+    Parquet or Arrow IPC (Feather) file of the filtered view, zstd-compressed per column
+    """
+    buffer = BytesIO()
+    if export_format == "Parquet":
+        filtered.to_parquet(buffer, index=False, compression=COLUMNAR_COMPRESSION)
+    else:
+        # Feather stores no index, so the view's row labels are dropped
+        filtered.reset_index(drop=True).to_feather(buffer, compression=COLUMNAR_COMPRESSION)
+    return buffer.getvalue()
+
+def build_export(filtered, export_format, start_date=None, end_date=None, compression=None, summaries=None):
+    """
+    Encode the filtered view as one of EXPORT_FORMATS; the PDF report also needs the filter's date range.
+    Text formats are streamed through iter_export() and joined in memory, compressed when compression is
+    given; write_export() streams them to a file instead. The Excel workbook adds a sheet per summary
+    ({sheet name: DataFrame}).
+    Returns (data as bytes, build_seconds).
+    """
+    started = time.perf_counter()
+    if export_format in STREAMED_FORMATS:
+        data = b"".join(iter_export(filtered, export_format, compression))
+    elif export_format == "Excel":
+        data = excel_bytes(filtered, summaries)
+    elif export_format in ("Parquet", "Feather"):
+        data = columnar_bytes(filtered, export_format)
+    elif export_format == "PDF":
+        data = quick_report_pdf(filtered, start_date, end_date).getvalue()
+    else:
+        raise ValueError(f"Unknown export format: {export_format}")
+    return data, time.perf_counter() - started
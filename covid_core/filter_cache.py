@@ -0,0 +1,34 @@
+"""
+Byte-bounded LRU cache of filtered views, shared by every session of the dashboard.
+"""
+import pandas as pd
+
+from .lru import ByteLRUCache
+
+FILTER_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+def filter_key(dataset_type, source_sha256, start_date, end_date, regions=None, countries=None):
+    """
+    Normalized cache key of a sidebar filter: dates as days, region/country selections as sorted tuples
+    (an empty selection means no filter, the same as None)
+    """
+    return (
+        dataset_type.lower(),
+        source_sha256,
+        pd.Timestamp(start_date).normalize(),
+        pd.Timestamp(end_date).normalize(),
+        tuple(sorted(set(regions or ()))),
+        tuple(sorted(set(countries or ()))),
+    )
+
+class FilterCache(ByteLRUCache):
+    """
+    LRU cache of filtered DataFrames, evicting by their total memory rather than count.
+    Cached frames are shared between sessions and must be treated as read-only.
+    """
+    def __init__(self, max_bytes=FILTER_CACHE_MAX_BYTES):
+        super().__init__(max_bytes, sizeof=lambda frame: frame.memory_usage(deep=True).sum())
+
+    def _stored_value(self, frame):
+        # An owned copy: a slice would pin its parent frame
+        return frame.copy()
@@ -0,0 +1,150 @@
+"""
+Position index over the processed frame, so the sidebar filters are answered by binary search and a
+single gather instead of boolean scans over every row.
+"""
+import time
+
+import numpy as np
+import pandas as pd
+
+from .deltas import group_boundaries
+
+def _blocks_by_name(block_names):
+    return {name: np.flatnonzero(block_names == name) for name in pd.unique(block_names) if pd.notna(name)}
+
+def build_filter_index(df):
+    """
+    Index a processed frame sorted by country then date. Rows split into blocks of one country and
+    WHO region; each block is a date-sorted run, searched through a (block, day) key. Country and
+    region names map to their block numbers.
+    """
+    if len(df):
+        block_starts = np.union1d(group_boundaries(df['Country']), group_boundaries(df['WHO_region']))
+    else:
+        block_starts = np.array([], dtype=np.int64)
+    block_sizes = np.diff(np.r_[block_starts, len(df)])
+    days = df['Date_reported'].to_numpy().astype('datetime64[D]').astype(np.int64)
+    day_origin = int(days.min()) if len(days) else 0
+    # One spare day per block, so a search past a block's last date never reaches the next block
+    day_span = int(days.max()) - day_origin + 2 if len(days) else 1
+    keys = np.repeat(np.arange(len(block_starts), dtype=np.int64), block_sizes) * day_span + (days - day_origin)
+
+    block_countries = df['Country'].to_numpy()[block_starts]
+    block_regions = df['WHO_region'].to_numpy()[block_starts]
+    return {
+        "blocks": len(block_starts),
+        "keys": keys,
+        "day_origin": day_origin,
+        "day_span": day_span,
+        "country_blocks": _blocks_by_name(block_countries),
+        "region_blocks": _blocks_by_name(block_regions),
+    }
+
+def _day(index, date):
+    return int(np.datetime64(pd.Timestamp(date), 'D').astype(np.int64)) - index["day_origin"]
+
+def filter_positions(index, start_date, end_date, regions=None, countries=None):
+    """
+    Row positions of the filter, in frame order: the selected blocks' date ranges found by binary search.
+    A selection that is one contiguous run (the full range, or a single country) comes back as a slice.
+    """
+    blocks = np.arange(index["blocks"], dtype=np.int64)
+    no_blocks = np.array([], dtype=np.int64)
+    if regions:
+        blocks = np.intersect1d(blocks, np.concatenate([index["region_blocks"].get(region, no_blocks) for region in regions]))
+    if countries:
+        blocks = np.intersect1d(blocks, np.concatenate([index["country_blocks"].get(country, no_blocks) for country in countries]))
+    blocks = blocks * index["day_span"]
+
+    # Days are clipped to the key span so a search never runs into a neighbouring block's keys
+    start_day = min(max(_day(index, start_date), 0), index["day_span"] - 1)
+    end_day = min(max(_day(index, end_date), -1), index["day_span"] - 1)
+    starts = np.searchsorted(index["keys"], blocks + start_day, side='left')
+    ends = np.searchsorted(index["keys"], blocks + end_day, side='right')
+
+    lengths = ends - starts
+    starts, ends, lengths = starts[lengths > 0], ends[lengths > 0], lengths[lengths > 0]
+    if len(starts) == 0 or np.array_equal(starts[1:], ends[:-1]):
+        return slice(int(starts[0]), int(ends[-1])) if len(starts) else slice(0, 0)
+
+    # Concatenate the [start, end) ranges without a Python loop
+    offsets = np.repeat(starts - np.r_[0, np.cumsum(lengths)[:-1]], lengths)
+    return offsets + np.arange(lengths.sum())
+
+# Representative sidebar filters for filter_benchmark, as (label, days back from the last date or None
+# for the full range, regions, number of countries)
+BENCHMARK_FILTERS = [
+    ("Full range, all regions", None, None, 0),
+    ("Last 90 days", 90, None, 0),
+    ("Full range, one region", None, 1, 0),
+    ("Last year, two regions", 365, 2, 0),
+    ("Full range, five countries", None, None, 5),
+]
+
+def filter_benchmark(df, index=None, repeats=5):
+    """
+    Time the boolean-mask filter against the indexed one on df for BENCHMARK_FILTERS (best of repeats, ms).
+    Both must return the same rows.
+    """
+    from .queries import filter_data
+
+    if index is None:
+        started = time.perf_counter()
+        index = build_filter_index(df)
+        index_seconds = time.perf_counter() - started
+    else:
+        index_seconds = float('nan')
+    last_date = df['Date_reported'].max()
+    all_regions = sorted(df['WHO_region'].dropna().unique())
+    all_countries = sorted(df['Country'].dropna().unique())
+    records = []
+    for label, days_back, n_regions, n_countries in BENCHMARK_FILTERS:
+        start = df['Date_reported'].min() if days_back is None else last_date - pd.Timedelta(days=days_back)
+        regions = all_regions[:n_regions] if n_regions else None
+        countries = all_countries[:n_countries] if n_countries else None
+        timings = {}
+        for method, method_index in (("Mask", None), ("Indexed", index)):
+            best = float('inf')
+            for _ in range(repeats):
+                started = time.perf_counter()
+                result = filter_data(df, start, last_date, regions, countries, index=method_index)
+                best = min(best, time.perf_counter() - started)
+            timings[method] = (best * 1000, result)
+        # Both select rows of df, so equal row labels mean equal frames
+        if not timings["Mask"][1].index.equals(timings["Indexed"][1].index):
+            raise AssertionError(f"Indexed filter returned different rows for '{label}'")
+        records.append({
+            "Filter": label,
+            "Rows": len(timings["Indexed"][1]),
+            "Mask (ms)": round(timings["Mask"][0], 2),
+            "Indexed (ms)": round(timings["Indexed"][0], 2),
+            "Speedup": round(timings["Mask"][0] / timings["Indexed"][0], 1),
+        })
+    report = pd.DataFrame(records)
+    report.attrs["index_build_ms"] = index_seconds * 1000
+    return report
+
+def synthetic_dataset(rows, countries=1000, seed=0):
+    """
+    A processed-like frame of about `rows` rows (daily reports for `countries` countries over 7 regions),
+    sorted by country then date, for benchmarking at sizes beyond the WHO files
+    """
+    rng = np.random.default_rng(seed)
+    days = max(rows // countries, 1)
+    names = [f"Country {i:05d}" for i in range(countries)]
+    regions = ['AFRO', 'AMRO', 'EMRO', 'EURO', 'OTHER', 'SEARO', 'WPRO']
+    new_cases = rng.poisson(50, size=(countries, days)).astype(np.int32)
+    new_deaths = rng.binomial(new_cases, 0.02).astype(np.int32)
+    cumulative_cases = np.cumsum(new_cases, axis=1).ravel()
+    cumulative_deaths = np.cumsum(new_deaths, axis=1).ravel()
+    return pd.DataFrame({
+        'Date_reported': np.tile(pd.date_range('2020-01-01', periods=days, freq='D').to_numpy(), countries),
+        'Country_code': pd.Categorical.from_codes(np.repeat(np.arange(countries), days), [f"C{i:05d}" for i in range(countries)]),
+        'Country': pd.Categorical.from_codes(np.repeat(np.arange(countries), days), names),
+        'WHO_region': pd.Categorical.from_codes(np.repeat(np.arange(countries) % len(regions), days), regions),
+        'New_cases': pd.array(new_cases.ravel(), dtype='Int32'),
+        'Cumulative_cases': pd.array(cumulative_cases, dtype='Int32'),
+        'New_deaths': pd.array(new_deaths.ravel(), dtype='Int32'),
+        'Cumulative_deaths': pd.array(cumulative_deaths, dtype='Int32'),
+        'Mortality_rate': (cumulative_deaths / np.maximum(cumulative_cases, 1) * 100).astype(np.float32),
+    })
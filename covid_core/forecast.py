@@ -0,0 +1,117 @@
+"""
+14-day forecasts of one country's metric with Prophet, or ARIMA when Prophet is missing or fails.
+Both models return a frame with ds, yhat, yhat_lower and yhat_upper columns.
+"""
+import signal
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+from .lazy import lazy_import
+
+FORECAST_PERIODS = 14
+
+def forecast_history(filtered, country, metric):
+    """
+    ds/y history of one country's metric; cumulative metrics keep only positive values, new counts allow zeros
+    """
+    country_df = filtered[filtered['Country'] == country][['Date_reported', metric]].copy()
+    country_df = country_df.rename(columns={'Date_reported': 'ds', metric: 'y'})
+    country_df['y'] = country_df['y'].astype('float64').fillna(0)
+    if "Cumulative" in metric:
+        country_df = country_df[country_df['y'] > 0]
+    return country_df
+
+def prophet_forecast(history, periods=FORECAST_PERIODS):
+    """
+    Prophet fit over the history plus the next periods days (the frame covers history and future dates)
+    """
+    Prophet = getattr(lazy_import("prophet"), "Prophet", None)
+    if Prophet is None or len(history) < 2:
+        raise ValueError("Prophet not installed or insufficient data")
+    m = Prophet()
+    m.fit(history)
+    future = m.make_future_dataframe(periods=periods)
+    return m.predict(future)[['ds', 'yhat', 'yhat_lower', 'yhat_upper']]
+
+def arima_ready(history):
+    """
+    ARIMA needs at least 10 points with some variation
+    """
+    y = history['y'].values
+    return len(y) >= 10 and not np.all(y == y[0])
+
+def arima_forecast(history, cumulative, periods=FORECAST_PERIODS):
+    """
+    ARIMA forecast for the periods after the history, at the history's inferred frequency (daily if unknown)
+    """
+    from statsmodels.tsa.arima.model import ARIMA
+
+    history = history.sort_values('ds')
+    order = (1, 1, 1) if cumulative else (2, 0, 2)
+    model_fit = ARIMA(history['y'].values, order=order).fit()
+    forecast_result = model_fit.get_forecast(steps=periods)
+    conf_int = forecast_result.conf_int()
+    if hasattr(conf_int, "to_numpy"):
+        conf_array = conf_int.to_numpy()
+    else:
+        conf_array = np.array(conf_int)
+    if conf_array.ndim == 1:
+        conf_array = np.column_stack((conf_array, conf_array))
+    last_date = pd.to_datetime(history['ds'].iloc[-1])
+    freq = pd.infer_freq(history['ds'])
+    if freq is None:
+        freq = "D"
+    return pd.DataFrame({
+        'ds': pd.date_range(last_date + pd.Timedelta(days=1), periods=periods, freq=freq),
+        'yhat': forecast_result.predicted_mean,
+        'yhat_lower': conf_array[:, 0],
+        'yhat_upper': conf_array[:, -1],
+    })
+
+@contextmanager
+def _time_limit(seconds):
+    # SIGALRM interrupts a fit that overruns; only where interval timers exist and in a main thread,
+    # which is where process pool workers run their tasks
+    if not seconds or not hasattr(signal, "setitimer") or threading.current_thread() is not threading.main_thread():
+        yield
+        return
+
+    def expired(signum, frame):
+        raise TimeoutError(f"model fit exceeded {seconds:g}s")
+
+    previous = signal.signal(signal.SIGALRM, expired)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+def fit_forecast(history, cumulative, periods=FORECAST_PERIODS, timeout=None):
+    """
+    Prophet forecast of a ds/y history, falling back to ARIMA when Prophet is missing, fails or runs
+    past timeout seconds (each model gets its own timeout). Returns a dict with the model name (None if
+    neither fitted), the history and forecast frames, fit seconds and (level, message) notes for the page.
+    """
+    started = time.perf_counter()
+    result = {"model": None, "history": history, "forecast": None, "notes": []}
+    try:
+        with _time_limit(timeout):
+            result.update(model="Prophet", forecast=prophet_forecast(history, periods))
+    except Exception as prophet_error:
+        result["notes"].append(("warning", f"Prophet not available or failed ({prophet_error}). Using ARIMA model as fallback."))
+        if not arima_ready(history):
+            result["notes"].append(("error", "Not enough data or no variation for ARIMA forecasting."))
+        else:
+            try:
+                with _time_limit(timeout):
+                    forecast = arima_forecast(history, cumulative, periods)
+                result.update(model="ARIMA", history=history.sort_values('ds'), forecast=forecast)
+            except Exception as e:
+                result["notes"].append(("error", f"ARIMA forecasting failed: {e}"))
+    result["seconds"] = time.perf_counter() - started
+    return result
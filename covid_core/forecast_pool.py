@@ -0,0 +1,118 @@
+"""
+Per-country forecasts fitted in a process pool, handed back one at a time as they finish.
+"""
+import multiprocessing
+import os
+import signal
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from .forecast import FORECAST_PERIODS, fit_forecast
+
+# Seconds one model (Prophet, then ARIMA) may take to fit before it is abandoned
+FORECAST_TIMEOUT_SECONDS = 60
+FORECAST_MAX_COUNTRIES = 30
+# How often iter_forecasts checks running fits against their limit, in seconds
+FORECAST_POLL_SECONDS = 0.5
+
+def forecast_workers():
+    """
+    Cores this process may run on
+    """
+    if hasattr(os, "sched_getaffinity"):
+        return max(len(os.sched_getaffinity(0)), 1)
+    return os.cpu_count() or 1
+
+def forecast_executor(max_workers=None):
+    """
+    Pool for iter_forecasts, one worker per available core.
+
+    Workers are forked, and all of them at once, here: a spawned or forkserver worker re-runs the parent's
+    __main__, which under Streamlit is the dashboard script itself. Forking a multi-threaded server can
+    hand a child a lock another thread held, so the fork happens once per pool, before any fit is queued,
+    and a worker that stalls anyway is reported by iter_forecasts so the caller can replace the pool.
+    Without fork (Windows) the fits run in threads.
+    """
+    max_workers = max_workers or forecast_workers()
+    if "fork" not in multiprocessing.get_all_start_methods():
+        return ThreadPoolExecutor(max_workers=max_workers)
+    executor = ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("fork"))
+    # A fork pool starts every worker on its first submit
+    executor.submit(os.getpid).result()
+    return executor
+
+def stop_forecast_executor(executor, timeout=5):
+    """
+    Shut down an executor from forecast_executor without waiting for its fits. Worker processes are killed
+    and joined (up to timeout seconds each) before this returns, so a stalled fit does not outlive its pool
+    and a replacement pool only starts once they are gone. Threads cannot be stopped: a thread fit that
+    overruns keeps running until it finishes.
+    """
+    # ProcessPoolExecutor has no public handle on its workers before Python 3.14; shutdown() drops this one
+    processes = list((getattr(executor, "_processes", None) or {}).values())
+    executor.shutdown(wait=False, cancel_futures=True)
+    for process in processes:
+        process.kill()
+    for process in processes:
+        process.join(timeout)
+
+def forecast_time_limited(executor):
+    """
+    Whether fits on executor stop each model after its timeout. That takes SIGALRM in the worker's main
+    thread, so only process pool workers on platforms with interval timers do; in the thread fallback
+    a slow fit runs to the end, and iter_forecasts only stops waiting for it.
+    """
+    return isinstance(executor, ProcessPoolExecutor) and hasattr(signal, "setitimer")
+
+def _failed(history, message, stalled=False):
+    return {
+        "model": None, "history": history, "forecast": None, "notes": [("error", message)], "seconds": 0.0,
+        "stalled": stalled,
+    }
+
+def iter_forecasts(histories, cumulative, executor=None, workers=None, periods=FORECAST_PERIODS,
+                   timeout=FORECAST_TIMEOUT_SECONDS):
+    """
+    Fit fit_forecast() for each {country: history} in a process pool, yielding (country, result) in the
+    order the fits finish. Without an executor, a pool of `workers` (default: one per core, at most one
+    per country) is created for the call and shut down afterwards.
+
+    Workers stop each model after timeout seconds. A fit is only timed from when it starts running, so fits
+    queued behind other sessions' work on a shared pool are not cut short. The pool hands a fit to a worker
+    with at most one fit queued ahead of it, so a fit still running 4 * timeout seconds after it started
+    (both models of that fit and of the one before) comes back as an error with result["stalled"] set:
+    its worker is stuck, and the pool should be replaced after stop_forecast_executor().
+    """
+    own_executor = executor is None
+    if own_executor:
+        executor = forecast_executor(min(workers or forecast_workers(), max(len(histories), 1)))
+    limit = 4 * timeout if timeout else None
+    futures = {}
+    try:
+        for country, history in histories.items():
+            futures[executor.submit(fit_forecast, history, cumulative, periods, timeout)] = country
+        pending, started = set(futures), {}
+        while pending:
+            done, _ = wait(pending, timeout=FORECAST_POLL_SECONDS if limit else None, return_when=FIRST_COMPLETED)
+            for future in done:
+                country = futures[future]
+                pending.discard(future)
+                try:
+                    yield country, future.result()
+                except BrokenProcessPool:
+                    raise
+                except Exception as e:
+                    yield country, _failed(histories[country], f"Forecast worker failed: {e}")
+            now = time.monotonic()
+            for future in [future for future in pending if future.running()]:
+                started.setdefault(future, now)
+                if now - started[future] > limit:
+                    pending.discard(future)
+                    country = futures[future]
+                    yield country, _failed(histories[country], f"Forecast did not finish within {limit:g}s", stalled=True)
+    finally:
+        for future in futures:
+            future.cancel()
+        if own_executor:
+            stop_forecast_executor(executor)
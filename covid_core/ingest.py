@@ -0,0 +1,270 @@
+"""
+Building the processed dataset from WHO CSVs: in memory, streamed in chunks, or appended incrementally.
+"""
+import numpy as np
+import pandas as pd
+
+from .deltas import compute_deltas, corrections_summary, group_boundaries
+from .geo import iso3_codes
+from .rollup import weekly_rollup
+from .schema import CATEGORY_COLUMNS, apply_compact_schema, float_counts
+
+# ---------- DATASET BUILD ----------
+# Only empty fields are missing: "NA" is Namibia's country code, not pandas' default NaN marker
+SOURCE_NA = {"keep_default_na": False, "na_values": [""]}
+
+def sunday_week_id(dates):
+    """
+    YYYYWW codes for Sunday-start weeks, the integer form of strftime('%Y-%U')
+    """
+    weekday_from_sunday = (dates.dt.dayofweek + 1) % 7
+    return dates.dt.year * 100 + (dates.dt.dayofyear + 6 - weekday_from_sunday) // 7
+
+def prepare_rows(df):
+    """
+    Basic cleaning, map locations and period columns for raw WHO rows, sorted by country then date
+    """
+    # Map location of each country code, resolved once here rather than on every map build
+    df.insert(df.columns.get_loc('Country_code') + 1, 'Location', iso3_codes(df['Country_code']))
+    # Basic data cleaning
+    # Integer period codes: Month is YYYYMM
+    df['Year'] = df['Date_reported'].dt.year
+    df['Month'] = df['Year'] * 100 + df['Date_reported'].dt.month
+    df['Week'] = df['Date_reported'].dt.isocalendar().week
+    
+    # Handle NaN values in WHO_region to fix tree map errors
+    df['WHO_region'] = df['WHO_region'].fillna('OTHER')
+    
+    # Make sure Country has no NaN values
+    df['Country'] = df['Country'].fillna('Unknown')
+    
+    return df.sort_values(['Country', 'Date_reported'], kind='stable')
+
+def derive_metrics(df, dataset_type, previous=None):
+    """
+    Add new daily/weekly counts and mortality to prepared rows.
+    previous (last cumulative values per country) seeds the diffs when df continues earlier rows.
+    Returns the frame and the per-country negative correction counts.
+    """
+    # Daily data is clipped after the weekly rollup so weekly totals net out corrections
+    deltas, corrections = compute_deltas(
+        df, ['Cumulative_cases', 'Cumulative_deaths'], clip=dataset_type != "daily", previous=previous
+    )
+    if dataset_type == "daily":
+        # Daily metrics
+        df['New_daily_cases'] = deltas[:, 0]
+        df['New_daily_deaths'] = deltas[:, 1]
+        
+        # Calculate weekly metrics from daily data
+        df['week_id'] = sunday_week_id(df['Date_reported'])
+        
+        # Weekly totals land on the last reported day of each country-week, other days stay NaN
+        week_ends, weekly_totals = weekly_rollup(df, deltas)
+        weekly = np.full_like(deltas, np.nan)
+        weekly[week_ends] = weekly_totals
+        df['New_weekly_cases'] = weekly[:, 0]
+        df['New_weekly_deaths'] = weekly[:, 1]
+        df.index = pd.RangeIndex(len(df))
+
+        # Fix negative values
+        for col in ['New_daily_cases', 'New_daily_deaths', 'New_weekly_cases', 'New_weekly_deaths']:
+            df[col] = df[col].clip(lower=0)
+    else:
+        # Weekly metrics
+        df['New_weekly_cases'] = deltas[:, 0]
+        df['New_weekly_deaths'] = deltas[:, 1]
+        
+        # Add placeholder columns for UI consistency
+        df['New_daily_cases'] = np.nan
+        df['New_daily_deaths'] = np.nan
+    
+    # Calculate mortality rate
+    df['Mortality_rate'] = (df['Cumulative_deaths'] / df['Cumulative_cases'] * 100).round(2)
+    df['Mortality_rate'] = df['Mortality_rate'].fillna(0).replace([np.inf, -np.inf], 0)
+    return df, corrections
+
+def build_dataset(file_path, dataset_type):
+    """
+    Parse the WHO CSV and derive all dashboard metrics.
+    Returns the frame in its compact schema and a report (memory, negative corrections per country)
+    """
+    df = prepare_rows(pd.read_csv(file_path, parse_dates=['Date_reported'], **SOURCE_NA))
+    df, corrections = derive_metrics(df, dataset_type)
+    df, report = apply_compact_schema(df)
+    report["corrections"] = corrections_summary(corrections)
+    return df, report
+
+# ---------- STREAMING INGESTION ----------
+# Sources above this size are processed chunk by chunk straight into the processed store
+STREAMING_THRESHOLD_BYTES = 512 * 1024 ** 2
+STREAM_CHUNK_ROWS = 250_000
+SOURCE_COLUMNS = [
+    'Date_reported', 'Country_code', 'Country', 'WHO_region',
+    'New_cases', 'Cumulative_cases', 'New_deaths', 'Cumulative_deaths'
+]
+SOURCE_DTYPES = {
+    'Country_code': object, 'Country': object, 'WHO_region': object,
+    'New_cases': 'float64', 'Cumulative_cases': 'float64', 'New_deaths': 'float64', 'Cumulative_deaths': 'float64'
+}
+
+def _open_week_mask(rows):
+    """
+    Mask of each country's last week in prepared daily rows (sorted by country then date)
+    """
+    week = sunday_week_id(rows['Date_reported']).to_numpy()
+    country_starts = group_boundaries(rows['Country'])
+    new_country = np.zeros(len(rows), dtype=bool)
+    new_country[country_starts] = True
+    week_run = np.cumsum(new_country | np.r_[True, week[1:] != week[:-1]])
+    country_ends = np.r_[country_starts[1:], len(rows)] - 1
+    last_week_run = np.repeat(week_run[country_ends], np.diff(np.r_[country_starts, len(rows)]))
+    return week_run == last_week_run
+
+def _split_open_weeks(rows):
+    """
+    Split prepared daily rows into (closed, open): open holds each country's last week in the chunk,
+    which may continue in the next chunk, so its weekly total cannot be computed yet.
+    """
+    open_week = _open_week_mask(rows)
+    return rows[~open_week], rows[open_week]
+
+def stream_build_dataset(file_path, dataset_type, output_path, chunk_rows=STREAM_CHUNK_ROWS):
+    """
+    Build the processed dataset chunk by chunk into a Parquet file with bounded memory.
+    Each country's last cumulative values are carried across chunks to seed its diffs, and for daily
+    data each country's trailing (possibly incomplete) week is held back and re-read with the next chunk.
+    Requires each country's rows in date order; countries may be interleaved.
+    Returns the report build_dataset() would give (memory figures summed over chunks).
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    carry = pd.DataFrame(columns=['Cumulative_cases', 'Cumulative_deaths', 'Date_reported'])
+    held = None
+    corrections = []
+    report = {"memory_before": 0, "memory_after": 0, "rows": 0}
+    writer = schema = None
+
+    def write_rows(rows):
+        nonlocal carry, writer, schema
+        first_dates = rows.groupby('Country', sort=False)['Date_reported'].first()
+        seen_dates = carry['Date_reported'].reindex(first_dates.index)
+        if (first_dates <= seen_dates).any():
+            raise ValueError(f"{file_path} must list each country's rows in date order for streaming ingestion")
+        rows, chunk_corrections = derive_metrics(rows, dataset_type, previous=carry)
+        corrections.append(chunk_corrections)
+        # Each country's positional last row, as the in-memory diffs see it (last() would skip missing values)
+        last_rows = rows.groupby('Country', sort=False).tail(1).set_index('Country')[carry.columns]
+        carry = last_rows if carry.empty else pd.concat([carry[~carry.index.isin(last_rows.index)], last_rows])
+        rows, chunk_report = apply_compact_schema(rows)
+        table = pa.Table.from_pandas(rows, preserve_index=False)
+        if writer is None:
+            # Categories differ per chunk, so the file stores plain strings (read back as dictionaries)
+            schema = pa.schema(
+                [pa.field(f.name, pa.string()) if pa.types.is_dictionary(f.type) else f for f in table.schema],
+                metadata=table.schema.metadata
+            )
+            writer = pq.ParquetWriter(output_path, schema)
+        writer.write_table(table.cast(schema))
+        report["memory_before"] += chunk_report["memory_before"]
+        report["memory_after"] += chunk_report["memory_after"]
+        report["rows"] += len(rows)
+
+    reader = pd.read_csv(
+        file_path, usecols=SOURCE_COLUMNS, dtype=SOURCE_DTYPES, parse_dates=['Date_reported'], chunksize=chunk_rows,
+        **SOURCE_NA
+    )
+    try:
+        for chunk in reader:
+            rows = prepare_rows(chunk if held is None else pd.concat([held, chunk], ignore_index=True))
+            if dataset_type == "daily":
+                rows, held = _split_open_weeks(rows)
+                held = held[SOURCE_COLUMNS]
+            if len(rows):
+                write_rows(rows)
+        if held is not None and len(held):
+            write_rows(prepare_rows(held))
+    finally:
+        reader.close()
+        if writer is not None:
+            writer.close()
+
+    report["corrections"] = corrections_summary(
+        pd.concat(corrections).groupby(level=0).sum() if corrections else pd.DataFrame()
+    )
+    return report
+
+# ---------- INCREMENTAL APPEND ----------
+def _last_source_rows(rows):
+    # Latest row per country, indexed by country
+    return rows.sort_values('Date_reported', kind='stable').drop_duplicates('Country', keep='last').set_index('Country')
+
+def incremental_build(file_path, dataset_type, stored, chunk_rows=STREAM_CHUNK_ROWS):
+    """
+    Process only the source rows whose Date_reported is newer than everything in the stored frame.
+    The older source rows must still match the store (same row count, same last date and cumulative
+    values per country), otherwise None is returned and the caller rebuilds. Diffs are seeded with each
+    country's last stored cumulative values; for daily data each country's last stored week is re-derived
+    together with the new rows so its weekly total stays complete, and the part supersedes those rows.
+    Returns (rows, supersedes, report) or None.
+    """
+    cumulative = ['Cumulative_cases', 'Cumulative_deaths']
+    last_date = stored['Date_reported'].max()
+    new_rows, old_last = [], []
+    old_count = 0
+    with pd.read_csv(
+        file_path, usecols=SOURCE_COLUMNS, dtype=SOURCE_DTYPES, parse_dates=['Date_reported'], chunksize=chunk_rows,
+        **SOURCE_NA
+    ) as reader:
+        for chunk in reader:
+            chunk['Country'] = chunk['Country'].fillna('Unknown')
+            is_new = (chunk['Date_reported'] > last_date).to_numpy()
+            old_count += int((~is_new).sum())
+            old_last.append(_last_source_rows(chunk[~is_new])[cumulative + ['Date_reported']])
+            new_rows.append(chunk[is_new])
+    new_rows = pd.concat(new_rows, ignore_index=True)
+    if len(new_rows) == 0 or old_count != len(stored):
+        return None
+
+    # Cheap consistency check: every country must end where the store ends
+    country_starts = group_boundaries(stored['Country'])
+    country_ends = np.r_[country_starts[1:], len(stored)] - 1
+    stored_last = float_counts(stored.iloc[country_ends][['Country', 'Date_reported'] + cumulative])
+    stored_last = stored_last.astype({'Country': str}).set_index('Country')
+    source_last = _last_source_rows(pd.concat(old_last).reset_index())
+    source_last = source_last.reindex(stored_last.index)
+    if not (
+        source_last['Date_reported'].equals(stored_last['Date_reported'])
+        and np.array_equal(source_last[cumulative].to_numpy(), stored_last[cumulative].to_numpy(), equal_nan=True)
+    ):
+        return None
+
+    supersedes = {}
+    if dataset_type == "daily":
+        # Re-derive each country's last stored week: its weekly total moves to the new week-end row
+        open_week = _open_week_mask(stored)
+        is_start = np.zeros(len(stored), dtype=bool)
+        is_start[country_starts] = True
+        open_starts = np.flatnonzero(open_week & (is_start | np.r_[True, ~open_week[:-1]]))
+        seed_positions = open_starts[~is_start[open_starts]] - 1
+        held = stored[open_week]
+        held_starts = group_boundaries(held['Country'])
+        supersedes = {
+            str(country): date.isoformat()
+            for country, date in zip(held['Country'].iloc[held_starts], held['Date_reported'].iloc[held_starts])
+        }
+    else:
+        seed_positions = country_ends
+        held = stored.iloc[:0]
+    previous = float_counts(stored.iloc[seed_positions][['Country'] + cumulative])
+    previous = previous.astype({'Country': str}).set_index('Country')
+
+    _, held_corrections = compute_deltas(held, cumulative, previous=previous)
+    held = float_counts(held[SOURCE_COLUMNS]).astype({col: object for col in CATEGORY_COLUMNS if col in SOURCE_COLUMNS})
+    rows = prepare_rows(pd.concat([held, new_rows], ignore_index=True))
+    rows, corrections = derive_metrics(rows, dataset_type, previous=previous)
+    rows, report = apply_compact_schema(rows)
+    # Corrections in the re-derived rows were already counted when they were first stored
+    report["corrections"] = corrections.sub(held_corrections, fill_value=0)
+    report["new_rows"] = len(new_rows)
+    return rows, supersedes, report
@@ -0,0 +1,64 @@
+"""
+Deferred imports for heavy optional libraries and an import-time report for them.
+"""
+import importlib
+import importlib.util
+import subprocess
+import sys
+
+import pandas as pd
+
+# Prophet, statsmodels, seaborn/matplotlib, reportlab and kaleido are imported by the tabs that use them,
+# the first time they run, so a server start and the first paint of the map and KPIs do not wait for them.
+DEFERRED_MODULES = [
+    "prophet", "statsmodels.tsa.arima.model", "statsmodels.api", "seaborn", "matplotlib.pyplot",
+    "reportlab.pdfgen.canvas", "kaleido"
+]
+STARTUP_MODULES = ["streamlit", "pandas", "numpy", "plotly.express", "plotly.graph_objects", "PIL.Image"]
+
+def lazy_import(name):
+    """
+    Import a module on first use. Returns None when it is not installed.
+    """
+    try:
+        return importlib.import_module(name)
+    except ImportError:
+        return None
+
+def module_available(name):
+    """
+    Whether a top-level module is installed, without importing it
+    """
+    return importlib.util.find_spec(name) is not None
+
+def _cumulative_import_us(stderr, name):
+    # -X importtime lines: "import time: self [us] | cumulative | imported package"
+    for line in stderr.splitlines():
+        fields = line.split("|")
+        if line.startswith("import time:") and len(fields) == 3 and fields[2].strip() == name:
+            return int(fields[1])
+    return None
+
+def import_time_report():
+    """
+    Measure each deferred module with `python -X importtime` in a fresh interpreter that has already
+    imported the startup modules, so the figure is what an eager top-level import would add to startup.
+    """
+    preload = "import " + ", ".join(STARTUP_MODULES)
+    processes = {
+        name: subprocess.Popen(
+            [sys.executable, "-X", "importtime", "-c", f"{preload}\nimport {name}"],
+            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True
+        )
+        for name in DEFERRED_MODULES
+    }
+    rows = []
+    for name, process in processes.items():
+        _, stderr = process.communicate()
+        cumulative_us = _cumulative_import_us(stderr, name) if process.returncode == 0 else None
+        rows.append({
+            "Module": name,
+            "Installed": process.returncode == 0,
+            "Import time (ms)": None if cumulative_us is None else round(cumulative_us / 1000, 1),
+        })
+    return pd.DataFrame(rows)
@@ -0,0 +1,82 @@
+"""
+Least-recently-used cache bounded by the total size of its values, shared by every session of the dashboard.
+"""
+import threading
+from collections import OrderedDict
+
+class ByteLRUCache:
+    """
+    LRU cache that evicts by the total size of its values in bytes (as measured by sizeof) rather than
+    their count, and counts hits, misses and evictions. Values are shared between sessions and must be
+    treated as read-only.
+    """
+    def __init__(self, max_bytes, sizeof=len):
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _stored_value(self, value):
+        # Hook for subclasses that store a copy rather than the value itself
+        return value
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value):
+        """
+        Store value under key, evicting the least recently used entries until the total fits;
+        a value larger than the whole budget is not cached. Returns the stored value.
+        """
+        value = self._stored_value(value)
+        nbytes = int(self.sizeof(value))
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key)[1]
+            if nbytes > self.max_bytes:
+                return value
+            while self._bytes + nbytes > self.max_bytes:
+                _, (_, evicted_bytes) = self._entries.popitem(last=False)
+                self._bytes -= evicted_bytes
+                self.evictions += 1
+            self._entries[key] = (value, nbytes)
+            self._bytes += nbytes
+        return value
+
+    def get_or_compute(self, key, compute):
+        """
+        The cached value for key, or compute() stored under it
+        """
+        value = self.get(key)
+        if value is None:
+            value = self.put(key, compute())
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+            }
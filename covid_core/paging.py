@@ -0,0 +1,48 @@
+"""
+Server-side paging of large tables: a view is sorted and searched once into row positions, and each
+page is a slice of those positions, so only the visible rows are ever materialized and sent.
+"""
+import numpy as np
+import pandas as pd
+
+TABLE_PAGE_SIZES = (25, 50, 100, 250)
+
+def _country_mask(frame, search):
+    countries = frame['Country']
+    if isinstance(countries.dtype, pd.CategoricalDtype):
+        # Matched once per category, then gathered through the codes
+        matches = countries.cat.categories.str.contains(search, case=False, regex=False)
+        codes = countries.cat.codes.to_numpy()
+        return np.r_[matches, False][codes]
+    return countries.astype(str).str.contains(search, case=False, regex=False).to_numpy()
+
+def table_positions(frame, sort_column=None, ascending=True, search=None):
+    """
+    Row positions of frame in display order: rows whose country contains search (case-insensitive),
+    stably sorted by sort_column with missing values last. Equal values keep frame order, so sorting a
+    country-then-date frame by date lists each date's countries alphabetically.
+    """
+    positions = np.arange(len(frame))
+    if search:
+        positions = positions[_country_mask(frame, search)]
+    if sort_column:
+        column = frame[sort_column].iloc[positions]
+        if isinstance(column.dtype, pd.CategoricalDtype):
+            # Categories are sorted, so codes order the same as the names
+            column = pd.Series(column.cat.codes.to_numpy(), dtype='float64').where(column.notna().to_numpy())
+        elif pd.api.types.is_numeric_dtype(column.dtype):
+            # Nullable counts as float64, so missing values rank as NaN
+            column = pd.Series(column.to_numpy(dtype='float64', na_value=np.nan))
+        ranks = column.rank(method='dense', ascending=ascending).to_numpy()
+        positions = positions[np.argsort(ranks, kind='stable')]
+    return positions
+
+def table_page(frame, positions, page, page_size):
+    """
+    Rows of a 1-based page of positions (see table_positions), with the page clamped to the valid range.
+    Returns (rows, page, number of pages).
+    """
+    pages = max(-(-len(positions) // page_size), 1)
+    page = min(max(int(page), 1), pages)
+    start = (page - 1) * page_size
+    return frame.iloc[positions[start:start + page_size]], page, pages
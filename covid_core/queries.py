@@ -0,0 +1,292 @@
+"""
+Filtering and the aggregations behind the KPI cards and dashboard tabs.
+All functions take and return plain DataFrames/dicts, so they run without Streamlit.
+"""
+import numpy as np
+import pandas as pd
+
+from .cube import SUM_COLUMNS, range_latest, range_peaks, range_sums
+from .filter_index import filter_positions
+from .rolling import add_rolling_columns
+from .schema import float_counts
+from .snapshot import as_of_rows, build_snapshot_index
+
+def filter_data(df, start_date, end_date, regions=None, countries=None, index=None):
+    """
+    Rows reported between start_date and end_date (inclusive), optionally limited to WHO regions and countries.
+    With a filter index of df (see filter_index.build_filter_index) the rows are gathered by position.
+    """
+    if index is not None:
+        return df.iloc[filter_positions(index, start_date, end_date, regions, countries)]
+    filtered = df[
+        (df['Date_reported'] >= pd.Timestamp(start_date)) &
+        (df['Date_reported'] <= pd.Timestamp(end_date))
+    ]
+    if regions:
+        filtered = filtered[filtered['WHO_region'].isin(regions)]
+    if countries:
+        filtered = filtered[filtered['Country'].isin(countries)]
+    return filtered
+
+def new_count_columns(view_options, dataset_type):
+    """
+    (cases, deaths, period) new-count columns for the KPI cards: daily only for the Daily New view of daily data
+    """
+    if view_options == "Daily New" and dataset_type == "Daily":
+        return 'New_daily_cases', 'New_daily_deaths', "Daily"
+    return 'New_weekly_cases', 'New_weekly_deaths', "Weekly"
+
+def _kpi_figures(latest_date, latest, previous, reported, countries, new_cases_col, new_deaths_col, period):
+    # latest, previous and reported hold {column: values} of the as-of rows; previous is None without any
+    global_cases = int(np.nansum(latest['Cumulative_cases']))
+    global_deaths = int(np.nansum(latest['Cumulative_deaths']))
+    if previous is not None:
+        previous_cases = int(np.nansum(previous['Cumulative_cases']))
+        previous_deaths = int(np.nansum(previous['Cumulative_deaths']))
+        case_change = global_cases - previous_cases
+        death_change = global_deaths - previous_deaths
+        case_percent = (case_change / previous_cases * 100) if previous_cases > 0 else 0
+        death_percent = (death_change / previous_deaths * 100) if previous_deaths > 0 else 0
+    else:
+        case_change = death_change = case_percent = death_percent = 0
+    return {
+        "latest_date": latest_date,
+        "global_cases": global_cases,
+        "global_deaths": global_deaths,
+        "affected_countries": countries,
+        "case_change": case_change,
+        "death_change": death_change,
+        "case_percent": case_percent,
+        "death_percent": death_percent,
+        "new_cases": int(np.nansum(reported[new_cases_col])),
+        "new_deaths": int(np.nansum(reported[new_deaths_col])),
+        "period": period,
+        "avg_mortality": (global_deaths / global_cases * 100) if global_cases > 0 else 0,
+    }
+
+def _kpi_from_rollup(rollup, view_options, dataset_type):
+    # Each selected country's last row in the date range and the row before it, read from the cube's columns
+    new_cases_col, new_deaths_col, period = new_count_columns(view_options, dataset_type)
+    cube = rollup["cube"]
+    columns = ['Cumulative_cases', 'Cumulative_deaths', new_cases_col, new_deaths_col]
+    latest_rows = rollup["ends"] - 1
+    previous_rows = latest_rows - 1
+    previous_rows = previous_rows[previous_rows >= rollup["starts"]]
+    latest_dates = cube["dates"][latest_rows]
+    latest_date = pd.Timestamp(latest_dates.max()) if len(latest_rows) else pd.NaT
+    reported_rows = latest_rows[latest_dates == latest_date.to_datetime64()] if len(latest_rows) else latest_rows
+    return _kpi_figures(
+        latest_date,
+        {col: cube["values"][col][latest_rows] for col in columns},
+        {col: cube["values"][col][previous_rows] for col in columns} if len(previous_rows) else None,
+        {col: cube["values"][col][reported_rows] for col in columns},
+        len(rollup["country_index"]), new_cases_col, new_deaths_col, period,
+    )
+
+def kpi_snapshot(filtered, view_options, dataset_type, rollup=None, snapshot=None):
+    """
+    Headline figures as of the latest reported date. Totals add up each country's latest row in the view,
+    even when the country did not report on that date, and the changes compare them with each country's
+    row before it; new counts only add up rows reported on the latest date itself. With a rollup (see
+    cube.slice_cube) for the same filter the rows are read from the cube; otherwise from a snapshot index
+    of filtered (see snapshot.build_snapshot_index). Both give the same figures.
+    """
+    if rollup is not None:
+        return _kpi_from_rollup(rollup, view_options, dataset_type)
+    if snapshot is None:
+        snapshot = build_snapshot_index(filtered)
+    new_cases_col, new_deaths_col, period = new_count_columns(view_options, dataset_type)
+    columns = ['Cumulative_cases', 'Cumulative_deaths', new_cases_col, new_deaths_col]
+    latest_date = snapshot["last_date"]
+    latest = as_of_rows(filtered, snapshot)
+    previous = as_of_rows(filtered, snapshot, lag=1)
+    reported = latest[latest['Date_reported'] == latest_date]
+    return _kpi_figures(
+        latest_date,
+        {col: latest[col].to_numpy(dtype='float64', na_value=np.nan) for col in columns},
+        {col: previous[col].to_numpy(dtype='float64', na_value=np.nan) for col in columns} if len(previous) else None,
+        {col: reported[col].to_numpy(dtype='float64', na_value=np.nan) for col in columns},
+        len(snapshot["starts"]), new_cases_col, new_deaths_col, period,
+    )
+
+def _rollup_countries(rollup):
+    cube = rollup["cube"]
+    return pd.DataFrame({
+        'Country': cube["countries"].take(rollup["country_index"]).reset_index(drop=True),
+        'Country_code': cube["country_codes"].take(rollup["country_index"]).reset_index(drop=True),
+        'WHO_region': cube["country_regions"].take(rollup["country_index"]).reset_index(drop=True),
+    })
+
+def _int_counts(values):
+    return pd.Series(values).astype('Int32')
+
+def top_countries(filtered, metric, n=10, rollup=None, snapshot=None):
+    """
+    The n countries with the highest metric on their latest report, counts as float64 for charting.
+    Latest values come from the rollup when given, otherwise from a snapshot index of filtered.
+    """
+    # Latest non-missing value per country within the range, as groupby().last() gives
+    if rollup is not None:
+        latest_by_country = _rollup_countries(rollup)
+        for col in SUM_COLUMNS:
+            latest_by_country[col] = _int_counts(range_latest(rollup, col))
+    else:
+        if snapshot is None:
+            snapshot = build_snapshot_index(filtered)
+        latest_by_country = as_of_rows(filtered, snapshot, fill_missing=True).reset_index(drop=True)
+    top = float_counts(latest_by_country.sort_values(metric, ascending=False).head(n))
+    top['Mortality_rate'] = (top['Cumulative_deaths'] / top['Cumulative_cases'] * 100).round(2)
+    return top
+
+def _sum_metrics(dataset_type):
+    metrics = {
+        'Cumulative_cases': 'sum',
+        'Cumulative_deaths': 'sum',
+        'New_weekly_cases': 'sum',
+        'New_weekly_deaths': 'sum'
+    }
+    if dataset_type == "Daily":
+        metrics.update({
+            'New_daily_cases': 'sum',
+            'New_daily_deaths': 'sum'
+        })
+    return metrics
+
+def trend_timeline(filtered, dataset_type, show_trends=True, rollup=None, windows=None):
+    """
+    Global totals per reporting date. When show_trends is set, adds the rolling mean, sum and growth
+    (see rolling.add_rolling_columns) of the new counts for each window in timeline rows, 7 days or
+    4 weeks by default; windows longer than the timeline are skipped.
+    """
+    timeline_metrics = {
+        'Cumulative_cases': 'sum',
+        'Cumulative_deaths': 'sum',
+    }
+    if dataset_type == "Daily":
+        timeline_metrics.update({
+            'New_daily_cases': 'sum',
+            'New_daily_deaths': 'sum',
+        })
+    timeline_metrics.update({
+        'New_weekly_cases': 'sum',
+        'New_weekly_deaths': 'sum'
+    })
+    if rollup is not None:
+        result = rollup["date_region"].groupby('Date_reported')[list(timeline_metrics)].sum().reset_index()
+    else:
+        result = filtered.groupby('Date_reported').agg(timeline_metrics).reset_index()
+    result = result.sort_values('Date_reported')
+
+    if show_trends:
+        if windows is None:
+            windows = [7 if dataset_type == "Daily" else 4]
+        windows = [window for window in windows if window <= len(result)]
+        new_counts = [col for col in timeline_metrics if col.startswith('New_')]
+        result = add_rolling_columns(result, new_counts, windows)
+    return result
+
+def regional_timeline(filtered, dataset_type, rollup=None):
+    """
+    Totals per reporting date and WHO region
+    """
+    if rollup is not None:
+        return rollup["date_region"][['Date_reported', 'WHO_region', *_sum_metrics(dataset_type)]].reset_index(drop=True)
+    return filtered.groupby(['Date_reported', 'WHO_region'], observed=True).agg(_sum_metrics(dataset_type)).reset_index()
+
+def regional_trends(filtered, dataset_type, metrics, windows, rollup=None):
+    """
+    regional_timeline() sorted by WHO region then date, with the rolling statistics of metrics for each
+    window (in timeline rows) computed per region in one pass
+    """
+    timeline = regional_timeline(filtered, dataset_type, rollup=rollup)
+    timeline = timeline.sort_values(['WHO_region', 'Date_reported'], kind='stable').reset_index(drop=True)
+    return add_rolling_columns(timeline, metrics, windows, group_column='WHO_region')
+
+def regional_summary(filtered, latest_date, dataset_type, rollup=None):
+    """
+    Per WHO region totals on latest_date with country counts and mortality, largest caseload first
+    """
+    if rollup is not None:
+        date_region = rollup["date_region"]
+        summary = date_region.loc[
+            date_region['Date_reported'] == latest_date, ['WHO_region', 'Countries', *_sum_metrics(dataset_type)]
+        ].reset_index(drop=True)
+    else:
+        region_summary_metrics = {'Country': 'nunique', **_sum_metrics(dataset_type)}
+        summary = filtered[filtered['Date_reported']==latest_date].groupby('WHO_region', observed=True).agg(
+            region_summary_metrics
+        ).reset_index().rename(columns={'Country': 'Countries'})
+
+    summary['Mortality_rate'] = (summary['Cumulative_deaths'] / summary['Cumulative_cases'] * 100).round(2)
+    return summary.sort_values('Cumulative_cases', ascending=False)
+
+def country_summary(filtered, dataset_type, rollup=None):
+    """
+    One row per country: peak cumulative counts, summed new counts and peak mortality
+    """
+    if rollup is not None:
+        summary = _rollup_countries(rollup).drop(columns='Country_code')
+        summary['Cumulative_cases'] = _int_counts(range_peaks(rollup, 'Cumulative_cases'))
+        summary['Cumulative_deaths'] = _int_counts(range_peaks(rollup, 'Cumulative_deaths'))
+        summary['New_weekly_cases'] = _int_counts(range_sums(rollup, 'New_weekly_cases'))
+        summary['New_weekly_deaths'] = _int_counts(range_sums(rollup, 'New_weekly_deaths'))
+        summary['Mortality_rate'] = range_peaks(rollup, 'Mortality_rate').astype(np.float32)
+        if dataset_type == "Daily":
+            summary['New_daily_cases'] = _int_counts(range_sums(rollup, 'New_daily_cases'))
+            summary['New_daily_deaths'] = _int_counts(range_sums(rollup, 'New_daily_deaths'))
+        return summary.sort_values('Cumulative_cases', ascending=False)
+    agg_metrics = {
+        'WHO_region': 'first',
+        'Cumulative_cases': 'max',
+        'Cumulative_deaths': 'max',
+        'New_weekly_cases': 'sum',
+        'New_weekly_deaths': 'sum',
+        'Mortality_rate': 'max'
+    }
+    if dataset_type == "Daily":
+        agg_metrics.update({
+            'New_daily_cases': 'sum',
+            'New_daily_deaths': 'sum'
+        })
+    return filtered.groupby('Country', observed=True).agg(agg_metrics).reset_index().sort_values('Cumulative_cases', ascending=False)
+
+def region_date_summary(filtered, dataset_type, rollup=None):
+    """
+    Per WHO region and reporting date totals with country counts and mortality
+    """
+    if rollup is not None:
+        summary = rollup["date_region"][['WHO_region', 'Date_reported', 'Countries', *_sum_metrics(dataset_type)]]
+        summary = summary.sort_values(['WHO_region', 'Date_reported']).reset_index(drop=True)
+    else:
+        region_agg_metrics = {'Country': 'nunique', **_sum_metrics(dataset_type)}
+        summary = filtered.groupby(['WHO_region', 'Date_reported'], observed=True).agg(region_agg_metrics).reset_index()
+        summary = summary.rename(columns={'Country': 'Countries'})
+    summary['Mortality_rate'] = (summary['Cumulative_deaths'] / summary['Cumulative_cases'] * 100).round(2)
+    return summary.sort_values(['WHO_region', 'Date_reported'])
+
+def correlation_inputs(filtered, dataset_type):
+    """
+    Complete rows of the metrics compared in the correlation heatmap
+    """
+    corr_cols = [
+        col for col in [
+            'Cumulative_cases', 'Cumulative_deaths', 'New_weekly_cases', 'New_weekly_deaths',
+            'Mortality_rate'
+        ] if col in filtered.columns
+    ]
+    if dataset_type == "Daily":
+        corr_cols += [col for col in ['New_daily_cases', 'New_daily_deaths'] if col in filtered.columns]
+    corr_cols = list(dict.fromkeys(corr_cols))
+    return filtered[corr_cols].dropna()
+
+def radar_matrix(latest, metrics):
+    """
+    Country names and a countries x metrics array of each metric as a percentage of its largest value
+    across the countries (0 for a metric whose largest value is not positive), from one row per country
+    """
+    values = latest[metrics].to_numpy(dtype='float64', na_value=np.nan)
+    # fmax skips missing values; an all-missing metric peaks at -inf and is zeroed like a non-positive one
+    peaks = np.fmax.reduce(values, axis=0, initial=-np.inf) if len(values) else np.zeros(len(metrics))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        normalized = np.where(peaks > 0, values / peaks * 100, 0.0)
+    return latest['Country'].astype(str).to_numpy(), normalized
@@ -0,0 +1,201 @@
+"""
+PDF reports of the filtered data. Needs reportlab; chart images additionally need kaleido.
+"""
+import tempfile
+from io import BytesIO
+
+import plotly.express as px
+import plotly.graph_objects as go
+from PIL import Image
+
+from .display import formatted_table
+from .lazy import module_available
+from .schema import float_counts
+from .snapshot import as_of_rows, build_snapshot_index
+
+REPORT_TOC = [
+    ("1. Cover Page", "cover"),
+    ("2. Summary Statistics", "summary"),
+    ("3. Key Charts", "charts"),
+    ("4. Data Table", "datatable")
+]
+
+def report_summary(kpis, start_date, end_date):
+    """
+    Summary statistics page of the report, from a kpi_snapshot()
+    """
+    return {
+        "Date Range": f"{start_date.strftime('%b %d, %Y')} - {end_date.strftime('%b %d, %Y')}",
+        "Affected Countries": kpis["affected_countries"],
+        "Total Cases": kpis["global_cases"],
+        "Total Deaths": kpis["global_deaths"],
+        "Mortality Rate (%)": f"{kpis['avg_mortality']:.2f}",
+        "New Cases (Current)": kpis["new_cases"],
+        "New Deaths (Current)": kpis["new_deaths"],
+    }
+
+def chart_images(filtered, latest_date, rollup=None, snapshot=None):
+    """
+    Render the report's key charts to temporary PNG files, yielding (path, title) as each one is written.
+    The map and top-10 chart show each country's latest row as of latest_date, from the snapshot index of
+    filtered when one is given; the trend chart is read from the rollup (see cube.slice_cube) when given.
+    """
+    if snapshot is None:
+        snapshot = build_snapshot_index(filtered)
+    latest = float_counts(as_of_rows(filtered, snapshot, latest_date))
+    # 1. Global map (static snapshot), placed by the ISO-3 Location resolved at load
+    located = latest[latest['Location'].notna()].astype({'Location': str})
+    fig_map_snapshot = px.scatter_geo(
+        located,
+        locations="Location",
+        color="Cumulative_cases",
+        size="Cumulative_cases",
+        hover_name="Country",
+        projection="natural earth",
+        title='Global COVID-19 Cases Snapshot',
+        color_continuous_scale="Viridis"
+    )
+    with tempfile.NamedTemporaryFile(suffix=".png", delete=False) as tmpfile:
+        fig_map_snapshot.write_image(tmpfile.name, format="png", width=900, height=500)
+        yield tmpfile.name, "Global COVID-19 Cases Map"
+    # 2. Top countries bar chart
+    fig_top = px.bar(
+        latest.sort_values("Cumulative_cases", ascending=False).head(10),
+        x="Country", y="Cumulative_cases", color="Cumulative_cases",
+        title="Top 10 Countries by Cases",
+        color_continuous_scale="Blues"
+    )
+    with tempfile.NamedTemporaryFile(suffix=".png", delete=False) as tmpfile:
+        fig_top.write_image(tmpfile.name, format="png", width=900, height=500)
+        yield tmpfile.name, "Top 10 Countries by Cases"
+    # 3. Trends chart
+    if rollup is not None:
+        timeline = float_counts(rollup["date_region"].groupby('Date_reported')[['Cumulative_cases', 'Cumulative_deaths']].sum().reset_index())
+    else:
+        timeline = filtered.groupby('Date_reported').agg({'Cumulative_cases': 'sum', 'Cumulative_deaths': 'sum'}).reset_index()
+    fig_trend = go.Figure()
+    fig_trend.add_trace(go.Scatter(x=timeline['Date_reported'], y=timeline['Cumulative_cases'], name="Cases", line=dict(color="#3b82f6")))
+    fig_trend.add_trace(go.Scatter(x=timeline['Date_reported'], y=timeline['Cumulative_deaths'], name="Deaths", line=dict(color="#ef4444")))
+    fig_trend.update_layout(title="Cumulative Cases & Deaths Over Time", xaxis_title="Date", yaxis_title="Count")
+    with tempfile.NamedTemporaryFile(suffix=".png", delete=False) as tmpfile:
+        fig_trend.write_image(tmpfile.name, format="png", width=900, height=500)
+        yield tmpfile.name, "Cumulative Cases & Deaths Over Time"
+
+def generate_pdf(summary, chart_imgs, chart_titles, toc, datatable_df, today_str):
+    """
+    Full report: cover, table of contents, summary statistics, chart images and the first 20 table rows
+    """
+    from reportlab.lib.pagesizes import letter
+    from reportlab.pdfgen import canvas
+
+    buffer = BytesIO()
+    c = canvas.Canvas(buffer, pagesize=letter)
+    width, height = letter
+    # --- Cover Page ---
+    c.setFont("Helvetica-Bold", 24)
+    c.drawCentredString(width/2, height-100, "COVID-19 Global Impact Analysis")
+    c.setFont("Helvetica", 16)
+    c.drawCentredString(width/2, height-140, "Manjot Singh")
+    c.setFont("Helvetica", 12)
+    c.drawCentredString(width/2, height-180, f"Date: {today_str}")
+    c.showPage()
+    # --- Table of Contents ---
+    c.setFont("Helvetica-Bold", 18)
+    c.drawString(72, height-100, "Table of Contents")
+    c.setFont("Helvetica", 12)
+    y = height-130
+    for idx, (title, _) in enumerate(toc):
+        c.drawString(90, y, f"{title}")
+        y -= 22
+    c.showPage()
+    # --- Summary Statistics ---
+    c.setFont("Helvetica-Bold", 18)
+    c.drawString(72, height-100, "Summary Statistics")
+    c.setFont("Helvetica", 12)
+    y = height-130
+    for k, v in summary.items():
+        c.drawString(90, y, f"{k}: {v}")
+        y -= 20
+    c.showPage()
+    # --- Charts ---
+    c.setFont("Helvetica-Bold", 18)
+    c.drawString(72, height-100, "Key Charts")
+    c.setFont("Helvetica", 12)
+    y = height-120
+    for img_path, title in zip(chart_imgs, chart_titles):
+        try:
+            img = Image.open(img_path)
+            aspect = img.width / img.height
+            img_width = width - 120
+            img_height = img_width / aspect
+            if img_height > (height-220):
+                img_height = height-220
+                img_width = img_height * aspect
+            c.drawString(90, y, title)
+            y -= 20
+            c.drawImage(img_path, 60, y-img_height, width=img_width, height=img_height)
+            y -= img_height + 30
+            if y < 120:
+                c.showPage()
+                y = height-120
+        except Exception:
+            continue
+    c.showPage()
+    # --- Data Table (first 20 rows) ---
+    c.setFont("Helvetica-Bold", 18)
+    c.drawString(72, height-100, "Data Table (First 20 Rows)")
+    c.setFont("Helvetica", 8)
+    y = height-120
+    data_cols = datatable_df.columns.tolist()
+    col_width = (width-100)//len(data_cols)
+    # Header
+    for i, col in enumerate(data_cols):
+        c.drawString(72 + i*col_width, y, str(col)[:15])
+    y -= 12
+    # Rows
+    for row in formatted_table(datatable_df.head(20)).itertuples(index=False):
+        for i, cell in enumerate(row):
+            c.drawString(72 + i*col_width, y, cell[:15])
+        y -= 12
+        if y < 60:
+            c.showPage()
+            y = height-120
+    c.save()
+    pdf = buffer.getvalue()
+    buffer.close()
+    return pdf
+
+def quick_report_pdf(filtered, start_date, end_date, map_figure=None):
+    """
+    Short sidebar report: title page and key metrics, plus a map snapshot when a figure is given and kaleido is installed.
+    Returns a BytesIO positioned at the start.
+    """
+    from reportlab.lib.pagesizes import letter
+    from reportlab.pdfgen import canvas
+
+    pdf_buffer = BytesIO()
+    c = canvas.Canvas(pdf_buffer, pagesize=letter)
+    width, height = letter
+    c.setFont("Helvetica-Bold", 24)
+    c.drawCentredString(width/2, height-100, "COVID-19 Analytics Report")
+    c.setFont("Helvetica", 14)
+    c.drawCentredString(width/2, height-130, f"Author: Manjot Singh")
+    c.drawCentredString(width/2, height-150, f"Date Range: {start_date.strftime('%b %d, %Y')} - {end_date.strftime('%b %d, %Y')}")
+    c.showPage()
+    c.setFont("Helvetica-Bold", 20)
+    c.drawString(50, height-50, "Key Metrics")
+    global_cases = int(filtered['Cumulative_cases'].sum())
+    global_deaths = int(filtered['Cumulative_deaths'].sum())
+    affected_countries = filtered['Country'].nunique()
+    c.setFont("Helvetica", 12)
+    c.drawString(50, height-80, f"Affected Countries: {affected_countries}")
+    c.drawString(50, height-100, f"Total Cases: {global_cases:,}")
+    c.drawString(50, height-120, f"Total Deaths: {global_deaths:,}")
+    if map_figure is not None and module_available("kaleido"):
+        tmp_map_path = tempfile.NamedTemporaryFile(delete=False, suffix=".png").name
+        map_figure.write_image(tmp_map_path, engine="kaleido")
+        c.drawImage(tmp_map_path, 50, height-400, width=500, preserveAspectRatio=True)
+    c.showPage()
+    c.save()
+    pdf_buffer.seek(0)
+    return pdf_buffer
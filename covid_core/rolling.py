@@ -0,0 +1,85 @@
+"""
+Trailing-window statistics from cumulative sums: every window, statistic, metric and group in one pass.
+"""
+import numpy as np
+import pandas as pd
+
+from .deltas import group_boundaries
+
+# Smoothing windows offered in the Trends tab, in days
+TREND_WINDOWS_DAYS = (7, 14, 28)
+ROLLING_STATS = ("mean", "sum", "growth")
+
+def window_rows(days, dataset_type):
+    """
+    Timeline rows covering a window of days: one row per day for daily data, per week for weekly data
+    """
+    return days if dataset_type == "Daily" else max(days // 7, 1)
+
+def rolling_stats(values, windows, group_starts=None, stats=ROLLING_STATS):
+    """
+    Trailing-window statistics of each column of a rows x metrics array, for several window lengths (in
+    rows) at once. Rows split into groups at group_starts (e.g. one run per country or region) and a window
+    never reaches into the previous group. Missing values are skipped, as rolling(min_periods=1) does:
+    - sum: total over the window (NaN if it holds no values)
+    - mean: total over the number of values in the window (NaN if there are none)
+    - growth: total over the window divided by the total over the window before it (NaN until two full
+      windows fit in the group; when the earlier total is 0, inf if the window's total is positive, else NaN)
+    Returns {(stat, window): rows x metrics array}.
+    """
+    values = np.asarray(values, dtype='float64')
+    if values.ndim == 1:
+        values = values[:, None]
+    rows = len(values)
+    # One running total of values and of non-missing counts per column; every window is a difference of two
+    totals = np.vstack([np.zeros((1, values.shape[1])), np.nancumsum(values, axis=0)])
+    counts = np.vstack([np.zeros((1, values.shape[1])), np.cumsum(~np.isnan(values), axis=0)])
+    positions = np.arange(rows)
+    if group_starts is None or len(group_starts) == 0:
+        group_start = np.zeros(rows, dtype=np.int64)
+    else:
+        first_rows = np.zeros(rows, dtype=np.int64)
+        first_rows[group_starts] = group_starts
+        group_start = np.maximum.accumulate(first_rows)
+
+    results = {}
+    for window in windows:
+        start = np.maximum(positions - window + 1, group_start)
+        window_total = totals[positions + 1] - totals[start]
+        window_count = counts[positions + 1] - counts[start]
+        if "sum" in stats:
+            results[("sum", window)] = np.where(window_count > 0, window_total, np.nan)
+        if "mean" in stats:
+            with np.errstate(divide='ignore', invalid='ignore'):
+                results[("mean", window)] = np.where(window_count > 0, window_total / window_count, np.nan)
+        if "growth" in stats:
+            earlier_start = positions - 2 * window + 1
+            earlier_total = totals[np.maximum(positions - window + 1, 0)] - totals[np.maximum(earlier_start, 0)]
+            full = (earlier_start >= group_start)[:, None]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                growth = np.where(earlier_total != 0, window_total / earlier_total, np.nan)
+            growth[(earlier_total == 0) & (window_total > 0)] = np.inf
+            results[("growth", window)] = np.where(full, growth, np.nan)
+    return results
+
+def rolling_column(metric, stat, window):
+    """
+    Name of the column add_rolling_columns() writes for a metric, statistic and window
+    """
+    return f"{metric}_{stat}_{window}"
+
+def add_rolling_columns(frame, metrics, windows, group_column=None, stats=ROLLING_STATS):
+    """
+    Copy of frame with a rolling_column() per metric, statistic and window (in rows), computed by
+    rolling_stats() in one pass. With group_column the frame must be sorted by it; windows then stay
+    within each group (e.g. per WHO region).
+    """
+    frame = frame.copy()
+    group_starts = group_boundaries(frame[group_column]) if group_column and len(frame) else None
+    results = rolling_stats(frame[metrics].to_numpy(dtype='float64', na_value=np.nan), windows, group_starts, stats)
+    columns = {
+        rolling_column(metric, stat, window): result[:, i]
+        for (stat, window), result in results.items()
+        for i, metric in enumerate(metrics)
+    }
+    return pd.concat([frame, pd.DataFrame(columns, index=frame.index)], axis=1)
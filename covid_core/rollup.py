@@ -0,0 +1,35 @@
+"""
+Weekly totals for daily data, computed in place on the country-then-date sorted frame.
+"""
+import numpy as np
+import pandas as pd
+
+def weekly_rollup(df, values, week_column='week_id', group_columns=('Country', 'WHO_region')):
+    """
+    Sum the rows of values (aligned with df) over each country-week of a country-then-date sorted frame.
+    Weeks are runs of equal (group_columns, week_column) keys, found by comparing neighbours,
+    so the totals need neither a groupby on string keys nor a merge back onto the frame.
+    Returns (week_ends, totals): the position of the last row of each week and an (m, k) array of sums.
+    """
+    if len(df) == 0:
+        return np.empty(0, dtype=np.int64), values[:0]
+    change = np.zeros(len(df), dtype=bool)
+    change[0] = True
+    for col in (*group_columns, week_column):
+        series = df[col]
+        keys = series.cat.codes.to_numpy() if isinstance(series.dtype, pd.CategoricalDtype) else series.to_numpy()
+        change[1:] |= keys[1:] != keys[:-1]
+    week_starts = np.flatnonzero(change)
+    week_ends = np.r_[week_starts[1:] - 1, len(df) - 1]
+    return week_ends, np.add.reduceat(values, week_starts, axis=0)
+
+WEEKLY_VIEW_COLUMNS = [
+    'Date_reported', 'Country_code', 'Location', 'Country', 'WHO_region', 'Cumulative_cases', 'Cumulative_deaths',
+    'Year', 'Month', 'Week', 'week_id', 'New_weekly_cases', 'New_weekly_deaths', 'Mortality_rate'
+]
+
+def weekly_view(daily_df):
+    """
+    One row per country-week from a processed daily frame: the week-end rows carrying the weekly totals
+    """
+    return daily_df.loc[daily_df['New_weekly_cases'].notna(), WEEKLY_VIEW_COLUMNS]
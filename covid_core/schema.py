@@ -0,0 +1,44 @@
+"""
+Compact dtype schema for the processed WHO frame.
+"""
+# Explicit dtypes for the processed frame: it is pickled and copied per session by st.cache_data,
+# so repeated country/region strings and float64 counts are the bulk of its footprint.
+CATEGORY_COLUMNS = ['Country', 'Country_code', 'Location', 'WHO_region']
+COUNT_COLUMNS = [
+    'New_cases', 'Cumulative_cases', 'New_deaths', 'Cumulative_deaths',
+    'New_daily_cases', 'New_daily_deaths', 'New_weekly_cases', 'New_weekly_deaths'
+]
+PERIOD_DTYPES = {'Year': 'int16', 'Month': 'int32', 'Week': 'int8', 'week_id': 'int32'}
+
+def apply_compact_schema(df):
+    """
+    Cast the processed frame to the compact schema and report memory before/after in bytes.
+    Country/region become categoricals, counts nullable Int32, Mortality_rate float32.
+    """
+    memory_before = int(df.memory_usage(deep=True).sum())
+    for col in CATEGORY_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype('category')
+    for col in COUNT_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype('Int32')
+    for col, dtype in PERIOD_DTYPES.items():
+        if col in df.columns:
+            df[col] = df[col].astype(dtype)
+    df['Mortality_rate'] = df['Mortality_rate'].astype('float32')
+    memory_after = int(df.memory_usage(deep=True).sum())
+    return df, {"memory_before": memory_before, "memory_after": memory_after}
+
+def float_counts(df):
+    """
+    Copy of df with the nullable count columns as float64 (NaN for missing).
+    Plotly cannot serialize pd.NA, so raw rows are passed through this before charting.
+    """
+    df = df.copy()
+    for col in COUNT_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype('float64')
+    return df
+
+def format_bytes(num_bytes):
+    return f"{num_bytes / 1024 ** 2:.1f} MB"
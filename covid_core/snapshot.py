@@ -0,0 +1,74 @@
+"""
+As-of snapshot index of a country-then-date sorted frame: each country's last row at or before any date,
+and the row before that, found by one binary search per country instead of sorting or scanning the rows.
+"""
+import numpy as np
+import pandas as pd
+
+from .deltas import group_boundaries
+
+def build_snapshot_index(frame):
+    """
+    Index a frame sorted by country then date (a processed frame or a filtered view of one): each country's
+    row range with a (country, day) search key, and for columns with missing values the position of the
+    last non-missing value at or before each row
+    """
+    country_starts = group_boundaries(frame['Country']) if len(frame) else np.array([], dtype=np.int64)
+    country_ends = np.r_[country_starts[1:], len(frame)].astype(np.int64)
+    days = frame['Date_reported'].to_numpy().astype('datetime64[D]').astype(np.int64)
+    day_origin = int(days.min()) if len(days) else 0
+    # One spare day per country, so a search past a country's last date never reaches the next country
+    day_span = int(days.max()) - day_origin + 2 if len(days) else 1
+    keys = np.repeat(np.arange(len(country_starts), dtype=np.int64), country_ends - country_starts) * day_span + (days - day_origin)
+
+    positions = np.arange(len(frame))
+    last_valid = {}
+    for col in frame.columns:
+        if pd.api.types.is_numeric_dtype(frame[col].dtype):
+            missing = frame[col].isna().to_numpy()
+            if missing.any():
+                last_valid[col] = np.maximum.accumulate(np.where(missing, -1, positions))
+    return {
+        "starts": country_starts,
+        "ends": country_ends,
+        "keys": keys,
+        "day_origin": day_origin,
+        "day_span": day_span,
+        "last_date": frame['Date_reported'].max() if len(frame) else pd.NaT,
+        "last_valid": last_valid,
+    }
+
+def as_of_positions(index, date=None, lag=0):
+    """
+    Per country, the position of its last row at or before date (default: the frame's last date), or of
+    the row lag rows before that; -1 where the country has no such row
+    """
+    date = index["last_date"] if date is None else date
+    if pd.isna(date):
+        return np.full(len(index["starts"]), -1, dtype=np.int64)
+    day = int(np.datetime64(pd.Timestamp(date), 'D').astype(np.int64)) - index["day_origin"]
+    # Clipped to the key span so a search never runs into a neighbouring country's keys
+    day = min(max(day, -1), index["day_span"] - 1)
+    offsets = np.arange(len(index["starts"]), dtype=np.int64) * index["day_span"]
+    positions = np.searchsorted(index["keys"], offsets + day, side='right') - 1 - lag
+    return np.where(positions >= index["starts"], positions, -1)
+
+def as_of_rows(frame, index, date=None, lag=0, fill_missing=False):
+    """
+    Each country's last row of frame at or before date (see as_of_positions), in frame order; countries
+    without one are left out. With fill_missing, columns take their last non-missing value at or before
+    that row instead, as groupby().last() gives.
+    """
+    positions = as_of_positions(index, date, lag)
+    found = positions >= 0
+    positions = positions[found]
+    rows = frame.iloc[positions]
+    if not fill_missing:
+        return rows
+    rows = rows.copy()
+    starts = index["starts"][found]
+    for col, last_valid in index["last_valid"].items():
+        valid_positions = last_valid[positions]
+        filled = frame[col].iloc[np.maximum(valid_positions, 0)].where(valid_positions >= starts)
+        rows[col] = filled.array
+    return rows
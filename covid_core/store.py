@@ -0,0 +1,283 @@
+"""
+Processed dataset store: Parquet parts plus a JSON manifest keyed by the source fingerprint.
+"""
+import datetime
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from .deltas import corrections_summary
+from .ingest import STREAMING_THRESHOLD_BYTES, build_dataset, incremental_build, stream_build_dataset
+from .schema import CATEGORY_COLUMNS
+
+logger = logging.getLogger(__name__)
+
+# Processed frames are persisted as Parquet next to a small JSON manifest so that
+# restarts and cache expiry skip the CSV parse / diff / weekly rollup entirely.
+PROCESSED_STORE_DIR = ".processed_store"
+# Bump whenever the processing in build_dataset() changes the output frame
+PIPELINE_VERSION = 7
+# Appended parts accumulate until there are this many, then the store is rewritten as a single file
+STORE_MAX_PARTS = 8
+DATASET_FILES = {
+    "daily": "WHO-COVID-19-global-daily-data.csv",
+    "weekly": "WHO-COVID-19-global-data.csv",
+}
+
+def _store_dir(dataset_type):
+    return os.path.join(PROCESSED_STORE_DIR, dataset_type)
+
+def _read_manifest(dataset_type):
+    try:
+        with open(os.path.join(_store_dir(dataset_type), "manifest.json")) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def source_fingerprint(file_path, previous=None):
+    """
+    Fingerprint a source CSV by size, mtime and SHA-256 of its content.
+    The content hash is reused from a previous fingerprint when size and mtime are unchanged.
+    """
+    stat = os.stat(file_path)
+    fingerprint = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+    if previous and previous.get("size") == stat.st_size and previous.get("mtime_ns") == stat.st_mtime_ns:
+        fingerprint["sha256"] = previous["sha256"]
+        return fingerprint
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    fingerprint["sha256"] = digest.hexdigest()
+    return fingerprint
+
+def _store_parts(manifest):
+    # Stores written before appends existed hold a single data.parquet
+    return manifest.get("parts") or [{"file": "data.parquet", "rows": manifest.get("rows")}]
+
+def combine_store_parts(frames, parts, sort=False):
+    """
+    Concatenate stored parts into one frame ordered by country then date.
+    A part's `supersedes` ({country: first date}) drops those countries' rows of earlier parts from that date on.
+    """
+    for i, part in enumerate(parts):
+        if not part.get("supersedes"):
+            continue
+        cutoffs = pd.Series(pd.to_datetime(list(part["supersedes"].values())), index=list(part["supersedes"].keys()))
+        for j in range(i):
+            country = frames[j]['Country']
+            cutoff = cutoffs.reindex(country.cat.categories).to_numpy()[country.cat.codes.to_numpy()]
+            frames[j] = frames[j][~(frames[j]['Date_reported'].to_numpy() >= cutoff)]
+    if len(frames) > 1:
+        # One astype per part: superseded parts are slices, and assigning into them would write through a copy
+        shared = {
+            col: pd.CategoricalDtype(union_categoricals([f[col] for f in frames], sort_categories=True).categories)
+            for col in CATEGORY_COLUMNS
+        }
+        df = pd.concat([f.astype(shared) for f in frames], ignore_index=True)
+    else:
+        df = frames[0]
+    # Dictionary columns come back with categories in order of appearance; keep them lexical
+    # so sorting by a categorical column orders rows alphabetically, as astype('category') does
+    for col in CATEGORY_COLUMNS:
+        if col in df.columns and not df[col].cat.categories.is_monotonic_increasing:
+            df[col] = df[col].cat.set_categories(df[col].cat.categories.sort_values())
+    if sort or len(frames) > 1:
+        # Streamed chunks and appended parts are only date-ordered within each country; restore the in-memory layout
+        df = df.sort_values(['Country', 'Date_reported'], kind='stable', ignore_index=True)
+    return df
+
+def _read_store_frame(dataset_type, manifest):
+    parts = _store_parts(manifest)
+    try:
+        frames = [
+            pd.read_parquet(os.path.join(_store_dir(dataset_type), part["file"]), read_dictionary=CATEGORY_COLUMNS)
+            for part in parts
+        ]
+    except Exception:
+        # Missing pyarrow or a damaged file: fall back to a rebuild
+        return None
+    return combine_store_parts(frames, parts, sort=manifest.get("layout") == "streamed")
+
+def read_processed_store(dataset_type, fingerprint, manifest):
+    """
+    Return the stored processed frame if it was built from the same source content, else None.
+    """
+    if (
+        manifest is None
+        or manifest.get("pipeline_version") != PIPELINE_VERSION
+        or manifest.get("source", {}).get("sha256") != fingerprint["sha256"]
+    ):
+        return None
+    return _read_store_frame(dataset_type, manifest)
+
+@contextmanager
+def _atomic_path(path):
+    """
+    A fresh temporary file beside path to write to; it replaces path when the block succeeds and is removed
+    otherwise. Each writer gets its own name, so concurrent sessions never share a temporary file.
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=os.path.basename(path) + ".", suffix=".tmp")
+    os.close(fd)
+    try:
+        yield tmp_path
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def _write_manifest(dataset_type, fingerprint, rows, build_info, layout, parts=None):
+    manifest = {
+        "pipeline_version": PIPELINE_VERSION,
+        "dataset_type": dataset_type,
+        "source": fingerprint,
+        "rows": rows,
+        "layout": layout,
+        "parts": parts or [{"file": "data.parquet", "rows": rows}],
+        **build_info,
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+    }
+    manifest_path = os.path.join(_store_dir(dataset_type), "manifest.json")
+    with _atomic_path(manifest_path) as tmp_path, open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+
+def write_processed_store(dataset_type, fingerprint, df, build_info):
+    """
+    Atomically replace the stored frame and manifest for a dataset. Failures are non-fatal.
+    """
+    store_dir = _store_dir(dataset_type)
+    try:
+        os.makedirs(store_dir, exist_ok=True)
+        data_path = os.path.join(store_dir, "data.parquet")
+        with _atomic_path(data_path) as tmp_path:
+            df.to_parquet(tmp_path)
+        _write_manifest(dataset_type, fingerprint, len(df), build_info, layout="grouped")
+        _remove_appended_parts(store_dir)
+    except Exception:
+        logger.warning("Could not write the %s processed store", dataset_type, exc_info=True)
+
+def _remove_appended_parts(store_dir):
+    for name in os.listdir(store_dir):
+        if name.startswith("part-"):
+            os.remove(os.path.join(store_dir, name))
+
+def stream_processed_store(dataset_type, fingerprint, file_path, start_time):
+    """
+    Build the store for a large source with stream_build_dataset() and return the manifest. Failures are
+    non-fatal: they are logged, the partial store is discarded and None is returned.
+    """
+    store_dir = _store_dir(dataset_type)
+    try:
+        os.makedirs(store_dir, exist_ok=True)
+        data_path = os.path.join(store_dir, "data.parquet")
+        with _atomic_path(data_path) as tmp_path:
+            report = stream_build_dataset(file_path, dataset_type, tmp_path)
+        rows = report.pop("rows")
+        _write_manifest(
+            dataset_type, fingerprint, rows, {"build_seconds": time.time() - start_time, **report}, layout="streamed"
+        )
+        _remove_appended_parts(store_dir)
+    except Exception:
+        logger.warning("Could not stream the %s processed store", dataset_type, exc_info=True)
+        # data.parquet may already be the new file; without a manifest nothing reads it as the old store
+        try:
+            os.remove(os.path.join(store_dir, "manifest.json"))
+        except OSError:
+            pass
+        return None
+    return _read_manifest(dataset_type)
+
+def append_processed_store(dataset_type, fingerprint, manifest, file_path):
+    """
+    Extend the store with the new reporting dates of a changed source instead of rebuilding it.
+    The new rows are written as an extra part; past STORE_MAX_PARTS the store is compacted into one file.
+    Returns (df, manifest, new_rows), or None when the store cannot be extended and a full rebuild is needed.
+    """
+    if manifest is None or manifest.get("pipeline_version") != PIPELINE_VERSION:
+        return None
+    stored = _read_store_frame(dataset_type, manifest)
+    if stored is None:
+        return None
+    try:
+        appended = incremental_build(file_path, dataset_type, stored)
+    except Exception:
+        return None
+    if appended is None:
+        return None
+    rows, supersedes, report = appended
+
+    corrections = pd.DataFrame.from_dict(manifest["corrections"], orient="index").reindex(
+        columns=report["corrections"].columns, fill_value=0
+    )
+    build_info = {
+        "build_seconds": manifest["build_seconds"],
+        "memory_before": manifest["memory_before"] + report["memory_before"],
+        "memory_after": manifest["memory_after"] + report["memory_after"],
+        "corrections": corrections_summary(corrections.add(report["corrections"], fill_value=0)),
+    }
+    parts = _store_parts(manifest)
+    part = {"file": f"part-{len(parts):04d}.parquet", "rows": len(rows), "supersedes": supersedes}
+    df = combine_store_parts([stored, rows], [{}, part])
+
+    if len(parts) + 1 > STORE_MAX_PARTS:
+        write_processed_store(dataset_type, fingerprint, df, build_info)
+    else:
+        try:
+            part_path = os.path.join(_store_dir(dataset_type), part["file"])
+            with _atomic_path(part_path) as tmp_path:
+                rows.to_parquet(tmp_path, index=False)
+            _write_manifest(dataset_type, fingerprint, len(df), build_info, manifest.get("layout"), parts + [part])
+        except Exception:
+            logger.warning("Could not append to the %s processed store", dataset_type, exc_info=True)
+    return df, {**manifest, **build_info}, report["new_rows"]
+
+def _build_info(manifest):
+    return {key: manifest[key] for key in ("build_seconds", "memory_before", "memory_after", "corrections")}
+
+def load_dataset(dataset_type="weekly"):
+    """
+    Load the processed dataset: served from the store when the source CSV is unchanged, appended to it
+    when the source only gained new reporting dates, otherwise rebuilt (streamed for large sources).
+    Returns (df, load_seconds, load_info); load_info["source_sha256"] identifies the source content.
+    Errors propagate to the caller.
+    """
+    start_time = time.time()
+    file_path = DATASET_FILES[dataset_type]
+    manifest = _read_manifest(dataset_type)
+    fingerprint = source_fingerprint(file_path, manifest.get("source") if manifest else None)
+    df = read_processed_store(dataset_type, fingerprint, manifest)
+    if df is not None:
+        load_time = time.time() - start_time
+        return df, load_time, {"source": "processed store", **_build_info(manifest), "source_sha256": fingerprint["sha256"]}
+
+    appended = append_processed_store(dataset_type, fingerprint, manifest, file_path)
+    if appended is not None:
+        # Only the new reporting dates were processed
+        df, manifest, new_rows = appended
+        load_time = time.time() - start_time
+        return df, load_time, {"source": f"appended {new_rows:,} new rows", **_build_info(manifest), "source_sha256": fingerprint["sha256"]}
+
+    if fingerprint["size"] >= STREAMING_THRESHOLD_BYTES:
+        # Too large to parse in one go: stream it into the store, then read the compact result
+        manifest = stream_processed_store(dataset_type, fingerprint, file_path, start_time)
+        df = read_processed_store(dataset_type, fingerprint, manifest)
+        if df is not None:
+            load_time = time.time() - start_time
+            return df, load_time, {"source": "streamed from CSV", **_build_info(manifest), "source_sha256": fingerprint["sha256"]}
+        # The store could not be written or read back: build the dataset in memory instead
+
+    df, build_report = build_dataset(file_path, dataset_type)
+    build_info = {"build_seconds": time.time() - start_time, **build_report}
+    write_processed_store(dataset_type, fingerprint, df, build_info)
+
+    # Calculate load time for performance monitoring
+    load_time = time.time() - start_time
+    return df, load_time, {"source": "rebuilt from CSV", **build_info, "source_sha256": fingerprint["sha256"]}